@@ -0,0 +1,51 @@
+import os
+import logging
+from codec import leer_body, respuesta
+from lotes import batch_get
+from telemetria import instrumentar
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+MAX_CLAVES = 500
+
+@instrumentar
+def lambda_handler(event, context):
+    try:
+        body = leer_body(event)
+
+        tenant_ids = body.get('tenant_ids')
+        fields = body.get('fields')
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+
+        if not isinstance(tenant_ids, list) or not tenant_ids or not all(isinstance(t, str) and t for t in tenant_ids):
+            return respuesta(400, {
+                'error': 'Debe proporcionar una lista "tenant_ids" no vacía'
+            })
+
+        if len(tenant_ids) > MAX_CLAVES:
+            return respuesta(400, {
+                'error': f'Máximo {MAX_CLAVES} organizaciones por consulta'
+            })
+
+        pendientes = set(tenant_ids)
+        proyeccion = None
+        if fields:
+            proyeccion = list(dict.fromkeys(['tenant_id', *fields]))
+
+        items = batch_get(os.environ['TABLE_ORG'], [{'tenant_id': t} for t in pendientes], proyeccion)
+        for item in items:
+            pendientes.discard(item['tenant_id'])
+
+        return respuesta(200, {
+            'organizaciones': items,
+            'no_encontrados': sorted(pendientes)
+        })
+
+    except Exception as e:
+        logger.error("Error al buscar organizaciones en lote", exc_info=True)
+        return respuesta(500, {
+            'error': 'Error interno del servidor',
+            'detalle': str(e)
+        })
@@ -1,26 +1,19 @@
-import boto3
 import os
-import json
 import logging
-import requests
-from decimal import Decimal
+from botocore.exceptions import ClientError
+from aws_clients import get_table, get_sqs_client
+from codec import dumps, leer_body, respuesta
+from contador_puertos import siguiente_puerto
+from telemetria import instrumentar
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-FASTAPI_URL = "http://54.87.200.201/crear-tenant"
-
-def json_serial(obj):
-    if isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    raise TypeError(f"Type {type(obj)} not serializable")
-
+@instrumentar
 def lambda_handler(event, context):
     try:
         # Obtener el body como dict
-        body = event.get('body')
-        if isinstance(body, str):
-            body = json.loads(body)
+        body = leer_body(event)
 
         tenant_id = body.get('tenant_id')
         dominio = body.get('dominio')
@@ -29,31 +22,21 @@ def lambda_handler(event, context):
         detalle = body.get('detalle')  # opcional
 
         if not all([tenant_id, dominio, descripcion, correo]):
-            return {
-                'statusCode': 400,
-                'body': {
-                    'error': 'Faltan uno o más campos requeridos: tenant_id, dominio, descripcion, correo'
-                }
-            }
+            return respuesta(400, {
+                'error': 'Faltan uno o más campos requeridos: tenant_id, dominio, descripcion, correo'
+            })
 
         # Inicializar recursos
-        nombre_tabla = os.environ["TABLE_ORG"]
-        dynamodb = boto3.resource('dynamodb')
-        t_org = dynamodb.Table(nombre_tabla)
+        t_org = get_table('TABLE_ORG')
 
         # Validar que no exista
         if 'Item' in t_org.get_item(Key={'tenant_id': tenant_id}):
-            return {
-                'statusCode': 409,
-                'body': {
-                    'error': f"Ya existe una organización con tenant_id '{tenant_id}'"
-                }
-            }
+            return respuesta(409, {
+                'error': f"Ya existe una organización con tenant_id '{tenant_id}'"
+            })
 
-        # Asignar puerto dinámicamente
-        scan_response = t_org.scan(Select='COUNT')
-        cantidad_orgs = scan_response.get('Count', 0)
-        puerto = 9200 + int(cantidad_orgs)
+        # Asignar puerto con el contador atómico (sin escanear t_org)
+        puerto = siguiente_puerto()
 
         logger.info(f"Puerto asignado para {tenant_id}: {puerto}")
 
@@ -63,50 +46,53 @@ def lambda_handler(event, context):
             'descripcion': descripcion,
             'correo': correo,
             'dominio': dominio,
-            'puerto': puerto
+            'puerto': puerto,
+            'provisioning_status': 'pendiente'
         }
         if detalle is not None:
             item['detalle'] = detalle
 
-        t_org.put_item(Item=item)
-
-        # 🔄 Intentar llamada a FastAPI
         try:
-            fastapi_response = requests.post(
-                FASTAPI_URL,
-                json={ "tenant": tenant_id, "puerto": puerto },
-                timeout=10  # solo para detectar errores inmediatos
+            t_org.put_item(
+                Item=item,
+                ConditionExpression='attribute_not_exists(tenant_id)'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return respuesta(409, {
+                'error': f"Ya existe una organización con tenant_id '{tenant_id}'"
+            })
+
+        # 🔄 Encolar el aprovisionamiento en FastAPI (lo hace Lambda_ProvisionarOrg)
+        estado = 'pendiente'
+        try:
+            get_sqs_client().send_message(
+                QueueUrl=os.environ['COLA_PROVISION'],
+                MessageBody=dumps({'tenant_id': tenant_id, 'puerto': puerto})
+            )
+        except Exception:
+            logger.error(f"No se pudo encolar el aprovisionamiento de {tenant_id}", exc_info=True)
+            estado = 'error'
+            t_org.update_item(
+                Key={'tenant_id': tenant_id},
+                UpdateExpression='SET provisioning_status = :estado',
+                ExpressionAttributeValues={':estado': estado}
             )
 
-            if fastapi_response.status_code not in [200]:
-                logger.warning(f"FastAPI respondió con código inesperado: {fastapi_response.status_code}")
-                logger.warning(f"Respuesta: {fastapi_response.text}")
-                # pero no fallamos; asumimos que se levantará más adelante
-        except requests.exceptions.RequestException as fastapi_err:
-            logger.warning(f"No se obtuvo respuesta inmediata de FastAPI: {fastapi_err}")
-            # asumimos que sigue ejecutándose o se levantará luego
-
-        return {
-            'statusCode': 200,
-            'body': {
-                'message': 'Organización registrada (FastAPI puede tardar en completar)',
-                'tenant_id': tenant_id,
-                'puerto': puerto
-            }
-        }
+        return respuesta(200, {
+            'message': 'Organización registrada (el aprovisionamiento se completa en segundo plano)',
+            'tenant_id': tenant_id,
+            'puerto': puerto,
+            'provisioning_status': estado
+        })
 
     except KeyError as e:
         logger.warning(f"Campo faltante: {str(e)}")
-        return {
-            'statusCode': 400,
-            'body': { 'error': f"Campo faltante en el body: {str(e)}" }
-        }
+        return respuesta(400, { 'error': f"Campo faltante en el body: {str(e)}" })
     except Exception as e:
         logger.error("Excepción inesperada", exc_info=True)
-        return {
-            'statusCode': 500,
-            'body': {
-                'error': 'Error interno del servidor',
-                'detalle': str(e)
-            }
-        }
+        return respuesta(500, {
+            'error': 'Error interno del servidor',
+            'detalle': str(e)
+        })
@@ -1,17 +1,105 @@
 import os
-import mimetypes
-import logging
+import gzip
 import base64
+import hashlib
+import logging
+from collections import namedtuple
+from types import MappingProxyType
+from telemetria import instrumentar
+
+try:
+    import brotli  # opcional: si no está en el paquete solo se sirve gzip
+except ImportError:
+    brotli = None
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), 'doc'))
+CACHE_CONTROL = os.environ.get('DOC_CACHE_CONTROL', 'public, max-age=300')
+COMPRIMIR = os.environ.get('DOC_COMPRESSION', 'true').lower() == 'true'
+MIN_COMPRESION = 256
+
+CONTENT_TYPES = {
+    '.html': 'text/html',
+    '.json': 'application/json',
+    '.js': 'application/javascript',
+    '.css': 'text/css',
+    '.svg': 'image/svg+xml',
+    '.png': 'image/png',
+    '.ico': 'image/x-icon'
+}
+
+# body ya listo para la respuesta (texto o base64) y variantes comprimidas en base64
+Asset = namedtuple('Asset', ['body', 'is_binary', 'content_type', 'etag', 'variantes'])
+
+def es_binario(content_type):
+    return not content_type.startswith('text') and content_type not in [
+        'application/json',
+        'application/javascript'
+    ]
+
+def cargar_asset(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    content_type = CONTENT_TYPES.get(extension)
+    if content_type is None:
+        import mimetypes
+        content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+
+    with open(file_path, 'rb') as f:
+        content = f.read()
+
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    variantes = {}
+    if COMPRIMIR and len(content) >= MIN_COMPRESION:
+        variantes['gzip'] = (f'"{digest}-gz"', base64.b64encode(gzip.compress(content, 9, mtime=0)).decode('utf-8'))
+        if brotli is not None:
+            variantes['br'] = (f'"{digest}-br"', base64.b64encode(brotli.compress(content)).decode('utf-8'))
+
+    binario = es_binario(content_type)
+    return Asset(
+        body=base64.b64encode(content).decode('utf-8') if binario else content.decode('utf-8'),
+        is_binary=binario,
+        content_type=content_type,
+        etag=f'"{digest}"',
+        variantes=MappingProxyType(variantes)
+    )
+
+def cargar_assets():
+    """Lee doc/ una sola vez por contenedor: ruta relativa -> Asset (inmutable)."""
+    assets = {}
+    for raiz, _, archivos in os.walk(BASE_PATH):
+        for nombre in archivos:
+            file_path = os.path.join(raiz, nombre)
+            relative_path = os.path.relpath(file_path, BASE_PATH).replace(os.sep, '/')
+            assets[relative_path] = cargar_asset(file_path)
+    logger.info(f"Assets de doc cargados: {len(assets)}")
+    return MappingProxyType(assets)
+
+ASSETS = cargar_assets()
+
+def elegir_encoding(accept_encoding, asset):
+    aceptados = set()
+    for parte in accept_encoding.split(','):
+        encoding, _, params = parte.partition(';')
+        params = params.replace(' ', '')
+        try:
+            q = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            q = 0.0
+        if q > 0:
+            aceptados.add(encoding.strip().lower())
+    for encoding in ['br', 'gzip']:
+        if encoding in asset.variantes and (encoding in aceptados or '*' in aceptados):
+            return encoding
+    return None
+
+@instrumentar
 def lambda_handler(event, context):
     try:
-        base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'doc'))
-
         # ✅ Usa 'path' (es más confiable que rawPath)
         req_path = event.get('path', '/doc')
+        headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
         logger.info(f"Ruta solicitada: {req_path}")
 
         # ✅ Quita el prefijo '/doc' y define el archivo destino
@@ -19,40 +107,49 @@ def lambda_handler(event, context):
         if relative_path in ['', '/']:
             relative_path = 'index.html'
         else:
-            relative_path = relative_path.lstrip('/')
-
-        # ✅ Normaliza la ruta final al archivo
-        file_path = os.path.abspath(os.path.join(base_path, os.path.normpath(relative_path)))
+            relative_path = os.path.normpath(relative_path.lstrip('/')).replace(os.sep, '/')
 
         # ✅ Verificación de seguridad (evita salir de /doc)
-        if not file_path.startswith(base_path):
-            logger.warning(f"Acceso no permitido: {file_path}")
+        if relative_path.startswith('..') or os.path.isabs(relative_path):
+            logger.warning(f"Acceso no permitido: {relative_path}")
             return forbidden_response()
 
-        # ✅ Verifica si el archivo existe
-        if not os.path.isfile(file_path):
-            logger.warning(f"Archivo no encontrado: {file_path}")
-            return not_found_response(file_path)
+        asset = ASSETS.get(relative_path)
+        if asset is None:
+            logger.warning(f"Archivo no encontrado: {relative_path}")
+            return not_found_response(relative_path)
 
-        # ✅ Detecta el tipo MIME
-        content_type, _ = mimetypes.guess_type(file_path)
-        content_type = content_type or 'application/octet-stream'
+        encoding = elegir_encoding(headers.get('accept-encoding', ''), asset)
+        etag, body = asset.variantes[encoding] if encoding else (asset.etag, asset.body)
 
-        with open(file_path, 'rb') as f:
-            content = f.read()
+        respuesta_headers = {
+            **cors_headers(),
+            'Content-Type': asset.content_type,
+            'ETag': etag,
+            'Cache-Control': CACHE_CONTROL,
+            'Vary': 'Accept-Encoding'
+        }
+
+        # ✅ El cliente ya tiene esta versión: 304 sin body
+        if_none_match = headers.get('if-none-match', '')
+        etags_asset = {asset.etag, *(e for e, _ in asset.variantes.values())}
+        if if_none_match.strip() == '*' or etags_asset & {e.strip().removeprefix('W/') for e in if_none_match.split(',')}:
+            return {
+                'statusCode': 304,
+                'headers': respuesta_headers,
+                'body': ''
+            }
 
-        is_binary = not content_type.startswith('text') and content_type not in [
-            'application/json',
-            'application/javascript'
-        ]
+        if encoding:
+            respuesta_headers['Content-Encoding'] = encoding
 
-        logger.info(f"Archivo servido: {file_path} (binary={is_binary})")
+        logger.info(f"Archivo servido: {relative_path} (binary={asset.is_binary}, encoding={encoding})")
 
         return {
             'statusCode': 200,
-            'headers': {**cors_headers(), 'Content-Type': content_type},
-            'body': base64.b64encode(content).decode('utf-8') if is_binary else content.decode('utf-8'),
-            'isBase64Encoded': is_binary
+            'headers': respuesta_headers,
+            'body': body,
+            'isBase64Encoded': asset.is_binary or encoding is not None
         }
 
     except Exception as e:
@@ -83,5 +180,3 @@ def cors_headers():
         'Access-Control-Allow-Headers': '*',
         'Access-Control-Allow-Methods': 'GET,OPTIONS'
     }
-
-
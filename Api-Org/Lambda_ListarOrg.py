@@ -1,39 +1,137 @@
-import boto3
-import os
+import base64
 import logging
-from decimal import Decimal
+from aws_clients import get_table
+from codec import dumps, leer_query, loads, respuesta
+from telemetria import instrumentar
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def json_serial(obj):
-    if isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    raise TypeError(f'Type {type(obj)} not serializable')
+LIMIT_DEFAULT = 100
+LIMIT_MAX = 1000
+SEGMENTOS_MAX = 16
 
+def codificar_cursor(last_key):
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(dumps(last_key).encode()).decode()
+
+def decodificar_cursor(cursor):
+    last_key = loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(last_key, dict) or not isinstance(last_key.get('tenant_id'), str):
+        raise ValueError('cursor inválido')
+    return last_key
+
+def codificar_cursor_segmentos(segmentos, claves):
+    """Cursor del scan por segmentos: la posición de cada segmento que no terminó."""
+    if not claves:
+        return None
+    estado = {'segmentos': segmentos, 'claves': {str(s): last_key for s, last_key in claves.items()}}
+    return base64.urlsafe_b64encode(dumps(estado).encode()).decode()
+
+def decodificar_cursor_segmentos(cursor, segmentos):
+    estado = loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(estado, dict) or estado.get('segmentos') != segmentos or not isinstance(estado.get('claves'), dict):
+        raise ValueError('cursor inválido')
+    claves = {}
+    for segmento, last_key in estado['claves'].items():
+        if not segmento.isdigit() or int(segmento) >= segmentos:
+            raise ValueError('cursor inválido')
+        if not isinstance(last_key, dict) or not isinstance(last_key.get('tenant_id'), str):
+            raise ValueError('cursor inválido')
+        claves[int(segmento)] = last_key
+    if not claves:
+        raise ValueError('cursor inválido')
+    return claves
+
+def proyeccion(fields):
+    """Arma ProjectionExpression/ExpressionAttributeNames a partir de 'a,b,c'."""
+    campos = [c.strip() for c in fields.split(',') if c.strip()]
+    if not campos:
+        return {}
+    nombres = {f"#f{i}": campo for i, campo in enumerate(campos)}
+    return {
+        'ProjectionExpression': ', '.join(nombres),
+        'ExpressionAttributeNames': nombres
+    }
+
+def scan_segmento(tabla, segmento, total_segmentos, extra, limit, last_key=None):
+    """Una página del segmento: (items, LastEvaluatedKey o None)."""
+    # meta.client es thread-safe (el recurso Table no) y ya deserializa los tipos
+    client = tabla.meta.client
+    kwargs = {'TableName': tabla.name, 'Segment': segmento, 'TotalSegments': total_segmentos,
+              'Limit': limit, **extra}
+    if last_key:
+        kwargs['ExclusiveStartKey'] = last_key
+    response = client.scan(**kwargs)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+@instrumentar
 def lambda_handler(event, context):
     try:
-        nombre_tabla = os.environ["TABLE_ORG"]
-        dynamodb = boto3.resource("dynamodb")
-        tabla = dynamodb.Table(nombre_tabla)
+        query = leer_query(event)
+        tabla = get_table("TABLE_ORG")
+        extra = proyeccion(query.get('fields') or '')
 
-        response = tabla.scan()
-        items = response.get("Items", [])
+        try:
+            limit = min(max(int(query.get('limit', LIMIT_DEFAULT)), 1), LIMIT_MAX)
+        except (ValueError, TypeError):
+            limit = LIMIT_DEFAULT
+
+        # Exportación: scan paralelo por segmentos, una página por segmento y
+        # `limit` items en total por respuesta (la respuesta de Lambda tiene tope de 6 MB)
+        if query.get('segments'):
+            try:
+                segmentos = min(max(int(query['segments']), 1), SEGMENTOS_MAX)
+            except (ValueError, TypeError):
+                return respuesta(400, {"error": "Parámetro segments inválido"})
 
-        return {
-            "statusCode": 200,
-            "body": {
+            pendientes = dict.fromkeys(range(segmentos))
+            if query.get('next'):
+                try:
+                    pendientes = decodificar_cursor_segmentos(query['next'], segmentos)
+                except ValueError:
+                    return respuesta(400, {"error": "Parámetro next inválido"})
+
+            por_segmento = max(limit // len(pendientes), 1)
+            from concurrent.futures import ThreadPoolExecutor  # solo para exportaciones
+            with ThreadPoolExecutor(max_workers=len(pendientes)) as pool:
+                paginas = list(pool.map(
+                    lambda s: scan_segmento(tabla, s, segmentos, extra, por_segmento, pendientes[s]), pendientes
+                ))
+
+            items = []
+            siguientes = {}
+            for segmento, (parte, last_key) in zip(pendientes, paginas):
+                items.extend(parte)
+                if last_key:
+                    siguientes[segmento] = last_key
+
+            return respuesta(200, {
                 "organizaciones": items,
-                "total": len(items)
-            }
-        }
+                "total": len(items),
+                "next": codificar_cursor_segmentos(segmentos, siguientes)
+            })
+
+        scan_args = {'Limit': limit, **extra}
+        if query.get('next'):
+            try:
+                scan_args['ExclusiveStartKey'] = decodificar_cursor(query['next'])
+            except ValueError:
+                return respuesta(400, {"error": "Parámetro next inválido"})
+
+        response = tabla.scan(**scan_args)
+        items = response.get("Items", [])
+
+        return respuesta(200, {
+            "organizaciones": items,
+            "total": len(items),
+            "next": codificar_cursor(response.get('LastEvaluatedKey'))
+        })
 
     except Exception as e:
         logger.error("Error inesperado en listar organizaciones", exc_info=True)
-        return {
-            "statusCode": 500,
-            "body": {
-                "error": "Error interno del servidor",
-                "detalle": str(e)
-            }
-        }
+        return respuesta(500, {
+            "error": "Error interno del servidor",
+            "detalle": str(e)
+        })
@@ -1,70 +1,47 @@
-import boto3
-import os
-import json
 import logging
 from decimal import Decimal
+from aws_clients import get_table
+from codec import leer_body, respuesta
+from telemetria import instrumentar
+from token_auth import validar_token
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+@instrumentar
 def lambda_handler(event, context):
     try:
         token = event['headers'].get('Authorization')
-        body = event.get('body')
-
-        if isinstance(body, str):
-            body = json.loads(body)
+        body = leer_body(event)
 
         tenant_id = body.get('tenant_id')
         if not token or not tenant_id:
-            return {
-                'statusCode': 400,
-                'body': {'error': 'Faltan token o tenant_id'}
-            }
-
-        # Validar token llamando a otra Lambda (sin json.dumps)
-        lambda_client = boto3.client('lambda')
-        funcion_validar = os.environ['FUNCION_VALIDAR']
-
-        validar_resp = lambda_client.invoke(
-            FunctionName=funcion_validar,
-            InvocationType='RequestResponse',
-            Payload=json.dumps({
-                'body': {'token': token, 'tenant_id': tenant_id}
-            })
-        )
-
-        validar_payload = json.loads(validar_resp['Payload'].read())
+            return respuesta(400, {'error': 'Faltan token o tenant_id'})
+
+        # Validar token en proceso contra t_token (sin invocar otra Lambda)
+        validar_payload = validar_token(token, tenant_id)
         if validar_payload.get('statusCode') != 200:
-            return {
-                'statusCode': validar_payload.get('statusCode', 403),
-                'body': {'error': 'Token inválido o expirado'}
-            }
+            return respuesta(validar_payload.get('statusCode', 403), {'error': 'Token inválido o expirado'})
 
-        # ✅ Ya no es string: leer directamente como objeto
         user_info = validar_payload['body']
-        if isinstance(user_info, str):
-            user_info = json.loads(user_info)
 
         if user_info.get('rol') != 'admin':
-            return {
-                'statusCode': 403,
-                'body': {'error': 'Solo un administrador puede modificar la organización'}
-            }
+            return respuesta(403, {'error': 'Solo un administrador puede modificar la organización'})
 
         # Verificar existencia del tenant
-        dynamodb = boto3.resource('dynamodb')
-        tabla = dynamodb.Table(os.environ["TABLE_ORG"])
+        tabla = get_table('TABLE_ORG')
 
         existe = tabla.get_item(Key={'tenant_id': tenant_id})
         if 'Item' not in existe:
-            return {
-                'statusCode': 404,
-                'body': {'error': f"No existe organización con tenant_id '{tenant_id}'"}
-            }
+            return respuesta(404, {'error': f"No existe organización con tenant_id '{tenant_id}'"})
 
         # Campos permitidos para actualización
-        campos_permitidos = ['dominio', 'descripcion', 'correo', 'detalle']
+        campos_permitidos = ['dominio', 'descripcion', 'correo', 'detalle', 'sesion_minutos', 'refresh_ventana_minutos']
+
+        # Duración de sesión y ventana de refresh de los tokens del tenant (minutos)
+        for campo in ['sesion_minutos', 'refresh_ventana_minutos']:
+            if campo in body and (not isinstance(body[campo], int) or isinstance(body[campo], bool) or body[campo] <= 0):
+                return respuesta(400, {'error': f'El campo "{campo}" debe ser un entero positivo'})
         update_expr = []
         expr_values = {}
         expr_names = {}
@@ -82,10 +59,7 @@ def lambda_handler(event, context):
                 actualizados.append(campo)
 
         if not update_expr:
-            return {
-                'statusCode': 400,
-                'body': {'error': 'No se proporcionaron campos para actualizar'}
-            }
+            return respuesta(400, {'error': 'No se proporcionaron campos para actualizar'})
 
         update_expression = "SET " + ", ".join(update_expr)
 
@@ -101,27 +75,18 @@ def lambda_handler(event, context):
 
         tabla.update_item(**update_args)
 
-        return {
-            'statusCode': 200,
-            'body': {
-                'message': 'Organización actualizada correctamente',
-                'tenant_id': tenant_id,
-                'actualizados': actualizados
-            }
-        }
+        return respuesta(200, {
+            'message': 'Organización actualizada correctamente',
+            'tenant_id': tenant_id,
+            'actualizados': actualizados
+        })
 
     except KeyError as e:
-        return {
-            'statusCode': 400,
-            'body': {'error': f"Campo faltante: {str(e)}"}
-        }
+        return respuesta(400, {'error': f"Campo faltante: {str(e)}"})
 
     except Exception as e:
         logger.error("Error inesperado en modificar organización", exc_info=True)
-        return {
-            'statusCode': 500,
-            'body': {
-                'error': 'Error interno del servidor',
-                'detalle': str(e)
-            }
-        }
+        return respuesta(500, {
+            'error': 'Error interno del servidor',
+            'detalle': str(e)
+        })
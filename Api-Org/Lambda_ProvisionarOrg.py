@@ -0,0 +1,87 @@
+import os
+import time
+import logging
+from botocore.exceptions import ClientError
+from aws_clients import get_table
+from codec import loads
+from telemetria import instrumentar, registrar_llamada
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+FASTAPI_URL = os.environ.get('FASTAPI_URL', 'http://54.87.200.201/crear-tenant')
+MAX_INTENTOS = int(os.environ.get('PROVISION_MAX_INTENTOS', '3'))
+BACKOFF_BASE = float(os.environ.get('PROVISION_BACKOFF', '1'))
+TIMEOUT_INTENTO = 10
+# Tiempo que se reserva al final de la invocación para actualizar_estado
+RESERVA_SEGUNDOS = 3
+
+def segundos_restantes(context):
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return float('inf')
+    return context.get_remaining_time_in_millis() / 1000 - RESERVA_SEGUNDOS
+
+def provisionar(tenant_id, puerto, context=None):
+    """POST a FastAPI con reintentos y backoff exponencial. Devuelve True si respondió 200.
+
+    Cada intento y cada espera se acotan al tiempo que le queda a la invocación,
+    así un FastAPI colgado nunca impide registrar el estado 'error'.
+    """
+    import requests  # diferido: solo este camino lo usa
+
+    for intento in range(1, MAX_INTENTOS + 1):
+        restante = segundos_restantes(context)
+        if restante < 1:
+            logger.warning(f"Sin tiempo para otro intento de aprovisionar {tenant_id} (intento {intento})")
+            break
+        inicio = time.perf_counter()
+        try:
+            response = requests.post(
+                FASTAPI_URL,
+                json={"tenant": tenant_id, "puerto": puerto},
+                timeout=min(TIMEOUT_INTENTO, restante)
+            )
+            registrar_llamada('fastapi.crear-tenant', (time.perf_counter() - inicio) * 1000,
+                              error=response.status_code != 200)
+            if response.status_code == 200:
+                return True
+            logger.warning(f"FastAPI respondió {response.status_code} para {tenant_id} (intento {intento}): {response.text}")
+        except requests.exceptions.RequestException as e:
+            registrar_llamada('fastapi.crear-tenant', (time.perf_counter() - inicio) * 1000, error=True)
+            logger.warning(f"Error llamando a FastAPI para {tenant_id} (intento {intento}): {e}")
+
+        if intento < MAX_INTENTOS:
+            time.sleep(max(min(BACKOFF_BASE * 2 ** (intento - 1), segundos_restantes(context) - 1), 0))
+    return False
+
+def actualizar_estado(tenant_id, estado):
+    try:
+        get_table('TABLE_ORG').update_item(
+            Key={'tenant_id': tenant_id},
+            UpdateExpression='SET provisioning_status = :estado',
+            ConditionExpression='attribute_exists(tenant_id)',
+            ExpressionAttributeValues={':estado': estado}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        logger.warning(f"La organización {tenant_id} ya no existe; no se actualiza su estado")
+
+@instrumentar
+def lambda_handler(event, context):
+    # Mensajes fallidos vuelven a la cola (ReportBatchItemFailures) y luego a la DLQ
+    fallidos = []
+    for record in event.get('Records', []):
+        try:
+            mensaje = loads(record['body'])
+            tenant_id = mensaje['tenant_id']
+            ok = provisionar(tenant_id, mensaje['puerto'], context)
+            actualizar_estado(tenant_id, 'listo' if ok else 'error')
+            logger.info(f"Aprovisionamiento de {tenant_id}: {'listo' if ok else 'error'}")
+            if not ok:
+                fallidos.append({'itemIdentifier': record['messageId']})
+        except Exception:
+            logger.error("Error inesperado al aprovisionar", exc_info=True)
+            fallidos.append({'itemIdentifier': record['messageId']})
+
+    return {'batchItemFailures': fallidos}
@@ -0,0 +1,52 @@
+import os
+import boto3
+from botocore.config import Config
+from telemetria import registrar_cliente
+
+# Clientes y tablas a nivel de módulo: se crean una vez por contenedor y se
+# reutilizan entre invocaciones (mismo pool de conexiones y endpoint resuelto).
+AWS_CONFIG = Config(
+    max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '25')),
+    tcp_keepalive=True,
+    retries={'max_attempts': 3, 'mode': 'standard'}
+)
+
+_dynamodb = None
+_lambda_client = None
+_sqs_client = None
+_s3_client = None
+_tables = {}
+
+def get_dynamodb():
+    global _dynamodb
+    if _dynamodb is None:
+        _dynamodb = boto3.resource('dynamodb', config=AWS_CONFIG)
+        registrar_cliente(_dynamodb.meta.client)
+    return _dynamodb
+
+def get_table(env_var):
+    """Devuelve el Table cuyo nombre está en la variable de entorno `env_var`."""
+    nombre = os.environ[env_var]
+    tabla = _tables.get(nombre)
+    if tabla is None:
+        tabla = _tables[nombre] = get_dynamodb().Table(nombre)
+    return tabla
+
+def get_lambda_client():
+    global _lambda_client
+    if _lambda_client is None:
+        _lambda_client = registrar_cliente(boto3.client('lambda', config=AWS_CONFIG))
+    return _lambda_client
+
+def get_sqs_client():
+    global _sqs_client
+    if _sqs_client is None:
+        _sqs_client = registrar_cliente(boto3.client('sqs', config=AWS_CONFIG))
+    return _sqs_client
+
+def get_s3_client():
+    # AWS_ENDPOINT_URL_S3 (si está definida) apunta a un S3 compatible
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = registrar_cliente(boto3.client('s3', config=AWS_CONFIG))
+    return _s3_client
@@ -0,0 +1,70 @@
+import logging
+from botocore.exceptions import ClientError
+from aws_clients import get_table
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+PUERTO_BASE = 9200
+CONTADOR = 'puertos'
+
+def _es_condicion_fallida(error):
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+def sembrar_contador():
+    """Inicializa el contador a partir de las organizaciones existentes.
+
+    Usa el mayor entre la cantidad de orgs y el último puerto asignado, así el
+    siguiente puerto nunca choca con uno ya repartido. No pisa un contador existente.
+    """
+    t_org = get_table('TABLE_ORG')
+    orgs = 0
+    ultimo = 0
+    kwargs = {'ProjectionExpression': 'puerto'}
+    while True:
+        response = t_org.scan(**kwargs)
+        for item in response.get('Items', []):
+            orgs += 1
+            if 'puerto' in item:
+                ultimo = max(ultimo, int(item['puerto']) - PUERTO_BASE + 1)
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    # Ambos por separado: sumar sobre el máximo parcial depende del orden del scan
+    asignados = max(orgs, ultimo)
+
+    try:
+        get_table('TABLE_CONTADOR').put_item(
+            Item={'contador': CONTADOR, 'valor': asignados},
+            ConditionExpression='attribute_not_exists(contador)'
+        )
+        logger.info(f"Contador de puertos inicializado en {asignados}")
+    except ClientError as e:
+        if not _es_condicion_fallida(e):
+            raise
+    return asignados
+
+def siguiente_puerto():
+    """Reserva un puerto con un único update_item atómico (O(1), sin carreras)."""
+    t_contador = get_table('TABLE_CONTADOR')
+    for _ in range(2):
+        try:
+            response = t_contador.update_item(
+                Key={'contador': CONTADOR},
+                UpdateExpression='ADD valor :uno',
+                ConditionExpression='attribute_exists(contador)',
+                ExpressionAttributeValues={':uno': 1},
+                ReturnValues='UPDATED_NEW'
+            )
+            return PUERTO_BASE + int(response['Attributes']['valor']) - 1
+        except ClientError as e:
+            if not _es_condicion_fallida(e):
+                raise
+            # Primera vez en este stage: sembrar desde t_org y reintentar
+            sembrar_contador()
+    raise RuntimeError('No se pudo reservar un puerto')
+
+if __name__ == '__main__':
+    # Migración: TABLE_ORG=dev-t_org TABLE_CONTADOR=dev-t_contador python contador_puertos.py
+    logging.basicConfig()
+    print(f"Contador de puertos: {sembrar_contador()}")
@@ -0,0 +1,60 @@
+import time
+import logging
+from aws_clients import get_dynamodb
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+MAX_GET = 100      # límite de BatchGetItem
+MAX_WRITE = 25     # límite de BatchWriteItem
+MAX_INTENTOS = 5
+
+def _esperar(intento):
+    time.sleep(min(0.05 * 2 ** intento, 1))
+
+def batch_get(nombre_tabla, keys, proyeccion=None):
+    """Lee `keys` con BatchGetItem en bloques de 100, reintentando UnprocessedKeys.
+
+    `proyeccion` es una lista de atributos; debe incluir la clave si el llamador
+    necesita relacionar cada item con su key.
+    """
+    dynamodb = get_dynamodb()
+    items = []
+    for i in range(0, len(keys), MAX_GET):
+        pedido = {'Keys': keys[i:i + MAX_GET]}
+        if proyeccion:
+            nombres = {f"#p{n}": campo for n, campo in enumerate(proyeccion)}
+            pedido['ProjectionExpression'] = ', '.join(nombres)
+            pedido['ExpressionAttributeNames'] = nombres
+
+        pendientes = {nombre_tabla: pedido}
+        for intento in range(MAX_INTENTOS):
+            response = dynamodb.batch_get_item(RequestItems=pendientes)
+            items.extend(response['Responses'].get(nombre_tabla, []))
+            pendientes = response.get('UnprocessedKeys') or {}
+            if not pendientes:
+                break
+            _esperar(intento)
+        else:
+            raise RuntimeError(f"BatchGetItem dejó claves sin procesar en {nombre_tabla}")
+    return items
+
+def batch_write(nombre_tabla, items):
+    """Escribe `items` con BatchWriteItem en bloques de 25, reintentando UnprocessedItems.
+
+    Devuelve los items que no se pudieron escribir tras MAX_INTENTOS.
+    """
+    client = get_dynamodb().meta.client
+    no_escritos = []
+    for i in range(0, len(items), MAX_WRITE):
+        pendientes = {nombre_tabla: [{'PutRequest': {'Item': item}} for item in items[i:i + MAX_WRITE]]}
+        for intento in range(MAX_INTENTOS):
+            response = client.batch_write_item(RequestItems=pendientes)
+            pendientes = response.get('UnprocessedItems') or {}
+            if not pendientes:
+                break
+            _esperar(intento)
+        else:
+            no_escritos.extend(r['PutRequest']['Item'] for r in pendientes[nombre_tabla])
+            logger.warning(f"{len(pendientes[nombre_tabla])} items sin escribir en {nombre_tabla}")
+    return no_escritos
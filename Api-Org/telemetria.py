@@ -0,0 +1,156 @@
+"""Telemetría por invocación: una línea JSON estructurada por request.
+
+    @instrumentar
+    def lambda_handler(event, context): ...
+
+La línea incluye cold/warm, duración total, status y por cada operación AWS
+(DynamoDB, Lambda invoke, SQS) la cantidad de llamadas, la latencia y la
+capacidad consumida. Con TELEMETRIA_FORMATO=emf además lleva el bloque `_aws`
+de CloudWatch Embedded Metric Format, así CloudWatch crea las métricas sin
+llamar a PutMetricData.
+
+TELEMETRIA_MUESTREO (0 a 1) define la fracción de invocaciones que se reportan;
+los cold starts y los errores se reportan siempre. ReturnConsumedCapacity solo
+se pide en las invocaciones muestreadas.
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+import functools
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+MUESTREO = float(os.environ.get('TELEMETRIA_MUESTREO', '1'))
+FORMATO = os.environ.get('TELEMETRIA_FORMATO', 'json')
+NAMESPACE = os.environ.get('TELEMETRIA_NAMESPACE', 'CloudProject')
+
+_frio = True
+_candado = threading.Lock()
+# Estado de la invocación en curso (un request a la vez por contenedor; el lock
+# cubre los hilos que un handler pueda lanzar, p. ej. el scan paralelo)
+_actual = None
+
+def registrar_llamada(operacion, ms, capacidad=0.0, error=False):
+    """Suma una llamada externa a la invocación en curso (no hace nada fuera de ella)."""
+    if _actual is None:
+        return
+    with _candado:
+        llamada = _actual['llamadas'].setdefault(operacion, {'n': 0, 'ms': 0.0, 'capacidad': 0.0, 'errores': 0})
+        llamada['n'] += 1
+        llamada['ms'] += ms
+        llamada['capacidad'] += capacidad
+        llamada['errores'] += int(error)
+
+def _pedir_capacidad(params, model, **kwargs):
+    if _actual is not None and _actual['muestreado'] and 'ReturnConsumedCapacity' in model.input_shape.members:
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+def _operacion(model):
+    return f"{model.service_model.service_id.hyphenize()}.{model.name}"
+
+def _antes(model, context, **kwargs):
+    context['telemetria_t0'] = time.perf_counter()
+    # after-call-error no recibe el modelo: la operación se guarda en el contexto
+    context['telemetria_operacion'] = _operacion(model)
+
+def _despues(http_response, parsed, model, context, **kwargs):
+    inicio = context.pop('telemetria_t0', None)
+    context.pop('telemetria_operacion', None)
+    if inicio is None:
+        return
+    consumida = parsed.get('ConsumedCapacity') or []
+    if isinstance(consumida, dict):
+        consumida = [consumida]
+    registrar_llamada(
+        _operacion(model),
+        (time.perf_counter() - inicio) * 1000,
+        sum(float(c.get('CapacityUnits', 0)) for c in consumida),
+        error='Error' in parsed
+    )
+
+def _despues_error(context, **kwargs):
+    # Fallo sin respuesta HTTP (timeout, conexión): cuenta como error
+    inicio = context.pop('telemetria_t0', None)
+    operacion = context.pop('telemetria_operacion', None)
+    if inicio is not None and operacion is not None:
+        registrar_llamada(operacion, (time.perf_counter() - inicio) * 1000, error=True)
+
+def registrar_cliente(client):
+    """Engancha los eventos de botocore de un cliente (ver aws_clients)."""
+    eventos = client.meta.events
+    servicio = client.meta.service_model.service_id.hyphenize()
+    eventos.register(f'before-parameter-build.{servicio}', _pedir_capacidad)
+    eventos.register(f'before-call.{servicio}', _antes)
+    eventos.register(f'after-call.{servicio}', _despues)
+    eventos.register(f'after-call-error.{servicio}', _despues_error)
+    return client
+
+def _emitir(registro):
+    if FORMATO == 'emf':
+        totales = {
+            'duracion_ms': registro['duracion_ms'],
+            'llamadas_aws': sum(ll['n'] for ll in registro['llamadas'].values()),
+            'ms_aws': round(sum(ll['ms'] for ll in registro['llamadas'].values()), 2),
+            'capacidad': sum(ll['capacidad'] for ll in registro['llamadas'].values())
+        }
+        registro.update(totales)
+        registro['_aws'] = {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [['funcion']],
+                'Metrics': [
+                    {'Name': 'duracion_ms', 'Unit': 'Milliseconds'},
+                    {'Name': 'llamadas_aws', 'Unit': 'Count'},
+                    {'Name': 'ms_aws', 'Unit': 'Milliseconds'},
+                    {'Name': 'capacidad', 'Unit': 'Count'}
+                ]
+            }]
+        }
+    # stdout directo: CloudWatch recibe la línea JSON sin el prefijo de logging
+    sys.stdout.write(json.dumps(registro, separators=(',', ':'), default=str) + '\n')
+    sys.stdout.flush()
+
+def instrumentar(handler):
+    """Decorador de lambda_handler que emite la línea de telemetría."""
+    @functools.wraps(handler)
+    def envoltura(event, context):
+        global _frio, _actual
+        frio, _frio = _frio, False
+        anterior = _actual
+        estado = _actual = {'muestreado': frio or random.random() < MUESTREO, 'llamadas': {}}
+        inicio = time.perf_counter()
+        status = None
+        try:
+            respuesta = handler(event, context)
+            if isinstance(respuesta, dict):
+                status = respuesta.get('statusCode')
+            return respuesta
+        except Exception:
+            status = 'excepcion'
+            raise
+        finally:
+            _actual = anterior
+            error = status == 'excepcion' or (isinstance(status, int) and status >= 500)
+            if estado['muestreado'] or error:
+                try:
+                    for llamada in estado['llamadas'].values():
+                        llamada['ms'] = round(llamada['ms'], 2)
+                    _emitir({
+                        'telemetria': 1,
+                        'funcion': getattr(context, 'function_name', handler.__module__),
+                        'request_id': getattr(context, 'aws_request_id', None),
+                        'memoria_mb': getattr(context, 'memory_limit_in_mb', None),
+                        'frio': frio,
+                        'status': status,
+                        'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2),
+                        'llamadas': estado['llamadas']
+                    })
+                except Exception:
+                    logger.warning("No se pudo emitir telemetría", exc_info=True)
+    return envoltura
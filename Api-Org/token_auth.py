@@ -0,0 +1,312 @@
+import os
+import time
+import hmac
+import json
+import uuid
+import base64
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from boto3.dynamodb.conditions import Key
+from aws_clients import get_table
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Cache LRU de tokens válidos por contenedor: (tenant_id, token) -> (vence_en, body)
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', '60'))
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', '1024'))
+
+_cache = OrderedDict()
+_stats = {'hits': 0, 'misses': 0}
+
+def _cache_get(clave):
+    entrada = _cache.get(clave)
+    if entrada is not None:
+        vence_en, body = entrada
+        if time.time() < vence_en:
+            _cache.move_to_end(clave)
+            _stats['hits'] += 1
+            return body
+        del _cache[clave]
+    _stats['misses'] += 1
+    return None
+
+def _cache_put(clave, body, exp):
+    # La entrada nunca sobrevive a la propia expiración del token
+    vence_en = min(time.time() + TOKEN_CACHE_TTL, exp)
+    if TOKEN_CACHE_SIZE <= 0 or vence_en <= time.time():
+        return
+    _cache[clave] = (vence_en, body)
+    _cache.move_to_end(clave)
+    while len(_cache) > TOKEN_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+# Tokens firmados (opt-in con TOKEN_FORMAT=firmado): "v1.<payload>.<firma HMAC-SHA256>"
+TOKEN_FORMAT = os.environ.get('TOKEN_FORMAT', 'uuid')
+PREFIJO_FIRMADO = 'v1.'
+REVOCATION_REFRESH = int(os.environ.get('REVOCATION_REFRESH', '30'))
+
+_revocados = {}
+
+# Expiración en t_token: 'exp' en epoch (atributo TTL de la tabla). Los registros
+# anteriores solo tienen 'expires_at' como texto ISO y se siguen aceptando.
+ATRIBUTO_TTL = 'exp'
+FORMATO_ISO = '%Y-%m-%dT%H:%M:%SZ'
+
+# Layout de t_token por stage (TOKEN_LAYOUT, param tokenLayout del serverless.yml):
+#   'tenant': HASH tenant_id + RANGE token. Todo un tenant cae en una sola
+#             partición: logins, validaciones y logouts de un tenant grande la saturan.
+#   'token':  HASH token + RANGE tenant_id (tabla TABLE_TOKEN_POR_TOKEN). Cada
+#             token es su propia partición y el tenant_id forma parte de la clave,
+#             así que un token solo se encuentra con el tenant que lo emitió.
+# La clave {'tenant_id', 'token'} es la misma en ambos layouts: get/put/delete/update
+# no cambian. Solo la lista de revocados (ver _clave_revocado) depende del layout.
+TOKEN_LAYOUT = os.environ.get('TOKEN_LAYOUT', 'tenant')
+
+def tabla_tokens():
+    """Table de tokens del layout configurado."""
+    return get_table('TABLE_TOKEN_POR_TOKEN' if TOKEN_LAYOUT == 'token' else 'TABLE_TOKEN')
+
+def formato_iso(exp):
+    return time.strftime(FORMATO_ISO, time.gmtime(exp))
+
+def exp_registro(registro):
+    """Epoch de expiración de un item de t_token (nuevo o legado)."""
+    if ATRIBUTO_TTL in registro:
+        return int(registro[ATRIBUTO_TTL])
+    expires = datetime.strptime(registro['expires_at'], FORMATO_ISO).replace(tzinfo=timezone.utc)
+    return int(expires.timestamp())
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+def _unb64(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def _firmar(mensaje):
+    clave = os.environ.get('TOKEN_SIGNING_KEY', '').encode()
+    if not clave:
+        # Un token firmado con clave vacía lo podría forjar cualquiera
+        raise RuntimeError('TOKEN_FORMAT=firmado requiere TOKEN_SIGNING_KEY')
+    return _b64(hmac.new(clave, mensaje.encode(), hashlib.sha256).digest())
+
+def es_token_firmado(token):
+    return token.startswith(PREFIJO_FIRMADO)
+
+def emitir_token_firmado(tenant_id, dni, full_name, rol, expires):
+    payload = {
+        'tid': tenant_id,
+        'dni': dni,
+        'nom': full_name,
+        'rol': rol,
+        'exp': int(expires.timestamp()),
+        'jti': uuid.uuid4().hex
+    }
+    cuerpo = PREFIJO_FIRMADO + _b64(json.dumps(payload, separators=(',', ':')).encode())
+    return f"{cuerpo}.{_firmar(cuerpo)}"
+
+def _leer_token_firmado(token):
+    """Verifica la firma y devuelve el payload, o None si el token fue alterado."""
+    if not os.environ.get('TOKEN_SIGNING_KEY'):
+        return None
+    cuerpo, _, firma = token.rpartition('.')
+    try:
+        # Bytes: compare_digest lanza TypeError con str no ASCII ('v1.x.ñ');
+        # encode lanza UnicodeError (ValueError) con surrogates sueltos
+        if not cuerpo or not hmac.compare_digest(firma.encode(), _firmar(cuerpo).encode()):
+            return None
+        return json.loads(_unb64(cuerpo[len(PREFIJO_FIRMADO):]))
+    except ValueError:
+        return None
+
+PREFIJO_REVOCADOS = 'revocado#'
+
+def _clave_revocados(tenant_id):
+    return f"{PREFIJO_REVOCADOS}{tenant_id}"
+
+def es_clave_reservada(tenant_id, token):
+    """True si (tenant_id, token) cae en la lista de revocados en vez de en una sesión.
+
+    Según el layout, 'revocado#<tenant>' va en tenant_id o en token y el jti
+    (visible dentro del token firmado) en el otro atributo: ninguna operación
+    de sesión (validar, logout, refresh) debe leer ni tocar esos items.
+    """
+    return str(tenant_id).startswith(PREFIJO_REVOCADOS) or str(token).startswith(PREFIJO_REVOCADOS)
+
+# Los revocados de un tenant se leen juntos con un query, así que siempre comparten
+# partición: en el layout 'token' la partición 'revocado#<tenant>' va en 'token' y
+# el jti en 'tenant_id'. Es poco tráfico: solo logouts de tokens firmados.
+_ATRIBUTO_PARTICION = 'token' if TOKEN_LAYOUT == 'token' else 'tenant_id'
+_ATRIBUTO_JTI = 'tenant_id' if TOKEN_LAYOUT == 'token' else 'token'
+
+def _clave_revocado(tenant_id, jti):
+    return {_ATRIBUTO_PARTICION: _clave_revocados(tenant_id), _ATRIBUTO_JTI: jti}
+
+def _jtis_revocados(tenant_id):
+    # La lista es pequeña: solo guarda tokens firmados aún no expirados
+    cargado_en, jtis = _revocados.get(tenant_id, (0, set()))
+    if time.time() - cargado_en < REVOCATION_REFRESH:
+        return jtis
+
+    table = tabla_tokens()
+    ahora = time.time()
+    jtis = set()
+    kwargs = {'KeyConditionExpression': Key(_ATRIBUTO_PARTICION).eq(_clave_revocados(tenant_id))}
+    while True:
+        response = table.query(**kwargs)
+        jtis.update(i[_ATRIBUTO_JTI] for i in response.get('Items', []) if exp_registro(i) > ahora)
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    _revocados[tenant_id] = (time.time(), jtis)
+    return jtis
+
+def revocar_token_firmado(tenant_id, token):
+    """Agrega un token firmado a la lista de revocados hasta su expiración."""
+    payload = _leer_token_firmado(token)
+    if payload is None or payload.get('tid') != tenant_id or payload['exp'] <= time.time():
+        return
+
+    table = tabla_tokens()
+    table.put_item(
+        Item={
+            **_clave_revocado(tenant_id, payload['jti']),
+            ATRIBUTO_TTL: payload['exp']
+        }
+    )
+    _revocados.get(tenant_id, (0, set()))[1].add(payload['jti'])
+
+def _validar_token_firmado(token, tenant_id):
+    payload = _leer_token_firmado(token)
+    if payload is None or payload.get('tid') != tenant_id:
+        return {
+            'statusCode': 403,
+            'body': {'error': 'Token no existe'}
+        }
+
+    if time.time() > payload['exp']:
+        return {
+            'statusCode': 403,
+            'body': {'error': 'Token expirado'}
+        }
+
+    if payload['jti'] in _jtis_revocados(tenant_id):
+        return {
+            'statusCode': 403,
+            'body': {'error': 'Token no existe'}
+        }
+
+    return {
+        'statusCode': 200,
+        'body': {
+            'message': 'Token válido',
+            'dni': payload.get('dni'),
+            'full_name': payload.get('nom'),
+            'rol': payload.get('rol'),
+            'expires_at': formato_iso(payload['exp'])
+        }
+    }
+
+def invalidar_token(tenant_id, token):
+    """Quita un token del cache de este contenedor (p. ej. en logout).
+
+    Los demás contenedores lo olvidan como máximo en TOKEN_CACHE_TTL segundos.
+    """
+    _cache.pop((tenant_id, token), None)
+
+def validar_token(token, tenant_id):
+    """Valida un token de acceso directamente contra la tabla t_token.
+
+    Devuelve la misma respuesta que la Lambda `validar` ({'statusCode', 'body'}),
+    así los handlers pueden validar en proceso sin un invoke Lambda-a-Lambda.
+    Los tokens firmados se verifican solo con CPU; los UUID van a la tabla.
+    """
+    if not token or not tenant_id:
+        return {
+            'statusCode': 400,
+            'body': {'error': 'Faltan token o tenant_id'}
+        }
+
+    if es_token_firmado(token):
+        return _validar_token_firmado(token, tenant_id)
+
+    if es_clave_reservada(tenant_id, token):
+        return {
+            'statusCode': 403,
+            'body': {'error': 'Token no existe'}
+        }
+
+    clave = (tenant_id, token)
+    cacheado = _cache_get(clave)
+    logger.info("token_cache %s hits=%d misses=%d size=%d",
+                'hit' if cacheado is not None else 'miss',
+                _stats['hits'], _stats['misses'], len(_cache))
+    if cacheado is not None:
+        return {
+            'statusCode': 200,
+            'body': dict(cacheado)
+        }
+
+    table = tabla_tokens()
+    response = table.get_item(Key={'tenant_id': tenant_id, 'token': token})
+
+    # Una sesión siempre tiene dni y rol; cualquier otro item de la tabla no es un token
+    registro = response.get('Item')
+    if registro is None or not registro.get('dni') or not registro.get('rol'):
+        return {
+            'statusCode': 403,
+            'body': {'error': 'Token no existe'}
+        }
+
+    exp = exp_registro(registro)
+
+    # DynamoDB borra por TTL con retraso, así que la expiración se sigue comprobando
+    if time.time() > exp:
+        return {
+            'statusCode': 403,
+            'body': {'error': 'Token expirado'}
+        }
+
+    body = {
+        'message': 'Token válido',
+        'dni': registro.get('dni'),
+        'full_name': registro.get('full_name'),
+        'rol': registro.get('rol'),
+        'expires_at': registro.get('expires_at') or formato_iso(exp)
+    }
+    _cache_put(clave, body, exp)
+
+    return {
+        'statusCode': 200,
+        'body': dict(body)
+    }
+
+def completar_ttl():
+    """Agrega 'exp' a los registros legados de t_token para que el TTL los borre."""
+    table = tabla_tokens()
+    actualizados = 0
+    kwargs = {'FilterExpression': 'attribute_not_exists(#exp)', 'ExpressionAttributeNames': {'#exp': ATRIBUTO_TTL}}
+    while True:
+        response = table.scan(**kwargs)
+        for item in response.get('Items', []):
+            if 'expires_at' not in item:
+                continue
+            table.update_item(
+                Key={'tenant_id': item['tenant_id'], 'token': item['token']},
+                UpdateExpression='SET #exp = :exp',
+                ExpressionAttributeNames={'#exp': ATRIBUTO_TTL},
+                ExpressionAttributeValues={':exp': exp_registro(item)}
+            )
+            actualizados += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return actualizados
+
+if __name__ == '__main__':
+    # Migración: TABLE_TOKEN=dev-t_token python token_auth.py
+    logging.basicConfig()
+    print(f"Tokens legados con TTL: {completar_ttl()}")
@@ -1,29 +1,40 @@
-import boto3
-import os
 import logging
 from decimal import Decimal
+from aws_clients import get_table
+from codec import leer_query, respuesta
+from conteo_usuarios import ROLES
+from indice_usuarios import buscar_por_dni
+from telemetria import instrumentar
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-dynamodb = boto3.resource('dynamodb')
-TABLE_USER = os.environ['TABLE_USER']
 
+@instrumentar
 def lambda_handler(event, context):
     try:
-        query = event.get('query') or {}
+        query = leer_query(event)
 
         tenant_id = query.get('tenant_id')
         dni = query.get('dni')
         rol = query.get('rol', '').lower()
 
-        if not all([tenant_id, dni, rol]):
-            return {
-                'statusCode': 400,
-                'body': {'error': 'Faltan tenant_id, dni o rol en la URL'}
-            }
+        if not all([tenant_id, dni]):
+            return respuesta(400, {'error': 'Faltan tenant_id o dni en la URL'})
+
+        # ✅ Sin rol: un solo query al índice por dni devuelve todos sus roles
+        if not rol:
+            usuarios = buscar_por_dni(tenant_id, dni)
+            if not usuarios:
+                return respuesta(404, {'error': 'Usuario no encontrado'})
+            for usuario in usuarios:
+                usuario.pop('password', None)
+            return respuesta(200, {'usuarios': usuarios})
 
-        tabla = dynamodb.Table(TABLE_USER)
+        if rol not in ROLES:
+            return respuesta(400, {'error': 'Parámetro rol inválido: admin, instructor o alumno'})
+
+        tabla = get_table('TABLE_USER')
         response = tabla.get_item(
             Key={
                 'tenant_id_rol': f"{tenant_id}#{rol}",
@@ -32,19 +43,13 @@ def lambda_handler(event, context):
         )
 
         if 'Item' not in response:
-            return {
-                'statusCode': 404,
-                'body': {'error': 'Usuario no encontrado'}
-            }
+            return respuesta(404, {'error': 'Usuario no encontrado'})
 
-        return {
-            'statusCode': 200,
-            'body': response['Item']
-        }
+        # El hash (con su sal y parámetros del KDF) nunca sale, con o sin rol
+        usuario = response['Item']
+        usuario.pop('password', None)
+        return respuesta(200, usuario)
 
     except Exception as e:
         logger.exception("Error inesperado en buscar_usuario")
-        return {
-            'statusCode': 500,
-            'body': {'error': 'Error interno', 'detalle': str(e)}
-        }
+        return respuesta(500, {'error': 'Error interno', 'detalle': str(e)})
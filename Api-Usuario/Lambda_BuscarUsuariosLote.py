@@ -0,0 +1,55 @@
+import os
+import logging
+from codec import leer_body, respuesta
+from conteo_usuarios import ROLES
+from lotes import batch_get
+from telemetria import instrumentar
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+MAX_CLAVES = 500
+
+@instrumentar
+def lambda_handler(event, context):
+    try:
+        body = leer_body(event)
+
+        claves = body.get('usuarios')
+        fields = body.get('fields')
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+
+        if not isinstance(claves, list) or not claves:
+            return respuesta(400, {'error': 'Se requiere una lista "usuarios" con tenant_id, rol y dni'})
+
+        if len(claves) > MAX_CLAVES:
+            return respuesta(400, {'error': f'Máximo {MAX_CLAVES} usuarios por consulta'})
+
+        keys = {}
+        for clave in claves:
+            if not isinstance(clave, dict) or not all(isinstance(clave.get(c), str) and clave.get(c) for c in ['tenant_id', 'rol', 'dni']):
+                return respuesta(400, {'error': 'Cada usuario debe tener tenant_id, rol y dni'})
+            if clave['rol'].lower() not in ROLES:
+                return respuesta(400, {'error': f"Rol inválido: {clave['rol']}"})
+            tenant_id_rol = f"{clave['tenant_id']}#{clave['rol'].lower()}"
+            keys[(tenant_id_rol, clave['dni'])] = {'tenant_id_rol': tenant_id_rol, 'dni': clave['dni']}
+
+        # Las claves siempre se proyectan para poder reportar las no encontradas
+        proyeccion = None
+        if fields:
+            proyeccion = list(dict.fromkeys(['tenant_id_rol', 'dni', *fields]))
+
+        items = batch_get(os.environ['TABLE_USER'], list(keys.values()), proyeccion)
+        for item in items:
+            keys.pop((item['tenant_id_rol'], item['dni']), None)
+            item.pop('password', None)
+
+        return respuesta(200, {
+            'usuarios': items,
+            'no_encontrados': list(keys.values())
+        })
+
+    except Exception as e:
+        logger.exception("Error inesperado en buscar_usuarios_lote")
+        return respuesta(500, {'error': 'Error interno', 'detalle': str(e)})
@@ -1,21 +1,26 @@
-import boto3
-import hashlib
-import os
 import logging
-import json
+from botocore.exceptions import ClientError
+from aws_clients import get_table
+from codec import leer_body, respuesta
+from conteo_usuarios import ROLES, escribir_con_conteo, es_admin_duplicado, es_conflicto
+from paralelo import en_paralelo
+from passwords import hash_password
+from telemetria import instrumentar
+from tenant_cache import buscar_tenant
+from token_auth import validar_token
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+def es_usuario_duplicado(error):
+    # La primera operación de la transacción es el Put del usuario
+    razones = error.response.get('CancellationReasons') or []
+    return bool(razones) and razones[0].get('Code') == 'ConditionalCheckFailed'
 
+@instrumentar
 def lambda_handler(event, context):
     try:
-        if isinstance(event['body'], str):
-            event['body'] = json.loads(event['body'])
-
-        body = event['body']
+        body = leer_body(event)
         tenant_id = body['tenant_id']
         dni = body['dni']
         full_name = body['full_name']
@@ -24,96 +29,45 @@ def lambda_handler(event, context):
         detalles = body.get('detalles')  # opcional
 
         if not all([tenant_id, dni, full_name, password, rol]):
-            return {
-                'statusCode': 400,
-                'body': {'error': 'Faltan tenant_id, dni, full_name, password o rol'}
-            }
-
-        lambda_client = boto3.client('lambda')
-        FUNCION_ORG = os.environ['FUNCION_ORG']
-
-        # ✅ Verificar que la organización exista
-        buscar_org_resp = lambda_client.invoke(
-            FunctionName=FUNCION_ORG,
-            InvocationType='RequestResponse',
-            Payload=json.dumps({
-                'query': {'tenant_id': tenant_id}
-            })
-        )
-        buscar_org_payload = json.loads(buscar_org_resp['Payload'].read())
+            return respuesta(400, {'error': 'Faltan tenant_id, dni, full_name, password o rol'})
 
-        if buscar_org_payload.get('statusCode') != 200:
-            return {
-                'statusCode': 404,
-                'body': {'error': f'Tenant "{tenant_id}" no está registrado'}
-            }
+        if rol not in ROLES:
+            return respuesta(400, {'error': 'Rol inválido: admin, instructor o alumno'})
 
-        tabla_usuarios = boto3.resource('dynamodb').Table(os.environ["TABLE_USER"])
+        tabla_usuarios = get_table('TABLE_USER')
         tenant_id_rol = f"{tenant_id}#{rol}"
+        token = event.get('headers', {}).get('Authorization') if rol == "instructor" else None
 
-        # ✅ Verificar si ya existe el usuario
-        existe = tabla_usuarios.get_item(
-            Key={'tenant_id_rol': tenant_id_rol, 'dni': dni}
+        # ✅ Organización y token del instructor son lecturas independientes: van a la vez
+        org, payload = en_paralelo(
+            lambda: buscar_tenant(tenant_id),
+            lambda: validar_token(token, tenant_id) if token else None
         )
-        if 'Item' in existe:
-            return {
-                'statusCode': 409,
-                'body': {
-                    'error': f'Ya existe un usuario con dni {dni} registrado como {rol} en este tenant'
-                }
-            }
-
-        # ✅ Validar que solo haya un admin por tenant
-        if rol == "admin":
-            resp = tabla_usuarios.query(
-                KeyConditionExpression=boto3.dynamodb.conditions.Key('tenant_id_rol').eq(tenant_id_rol),
-                Limit=1
-            )
-            if resp.get('Items'):
-                return {
-                    'statusCode': 409,
-                    'body': {'error': 'Ya existe un administrador registrado para este tenant'}
-                }
+
+        # ✅ Verificar que la organización exista (cache del contenedor + t_org)
+        if org is None:
+            return respuesta(404, {'error': f'Tenant "{tenant_id}" no está registrado'})
 
         # ✅ Validar token si se crea un instructor
         if rol == "instructor":
-            token = event.get('headers', {}).get('Authorization')
             if not token:
-                return {
-                    'statusCode': 403,
-                    'body': {'error': 'Token requerido para crear un instructor'}
-                }
-
-            FUNCION_VALIDAR = os.environ['FUNCION_VALIDAR']
-            validacion = lambda_client.invoke(
-                FunctionName=FUNCION_VALIDAR,
-                InvocationType='RequestResponse',
-                Payload=json.dumps({
-                    'body': {
-                        'token': token,
-                        'tenant_id': tenant_id
-                    }
-                })
-            )
-            payload = json.loads(validacion['Payload'].read())
+                return respuesta(403, {'error': 'Token requerido para crear un instructor'})
 
             if payload.get('statusCode') != 200:
-                return {
-                    'statusCode': 403,
-                    'body': {'error': 'Token inválido o expirado'}
-                }
+                return respuesta(403, {'error': 'Token inválido o expirado'})
 
             usuario_autenticado = payload['body']  # ✅ ya es un objeto
             if usuario_autenticado.get('rol') != 'admin':
-                return {
-                    'statusCode': 401,
-                    'body': {'error': 'Solo administradores pueden crear instructores'}
-                }
+                return respuesta(401, {'error': 'Solo administradores pueden crear instructores'})
 
-        # ✅ Registrar usuario
+        if detalles is not None and not isinstance(detalles, dict):
+            return respuesta(400, {'error': 'El campo "detalles" debe ser un objeto JSON'})
+
+        # ✅ Registrar usuario: el hash (CPU) solo para requests que pasaron las validaciones
         hashed_password = hash_password(password)
         item = {
             'tenant_id_rol': tenant_id_rol,
+            'tenant_id': tenant_id,
             'dni': dni,
             'full_name': full_name,
             'rol': rol,
@@ -121,36 +75,47 @@ def lambda_handler(event, context):
         }
 
         if detalles is not None:
-            if not isinstance(detalles, dict):
-                return {
-                    'statusCode': 400,
-                    'body': {'error': 'El campo "detalles" debe ser un objeto JSON'}
-                }
             item['detalles'] = detalles
 
-        tabla_usuarios.put_item(Item=item)
+        # ✅ Una sola escritura: alta condicional + conteo por rol en la misma transacción.
+        # attribute_not_exists evita duplicados y el conteo garantiza un solo admin
+        try:
+            escribir_con_conteo(
+                [{
+                    'Put': {
+                        'TableName': tabla_usuarios.name,
+                        'Item': item,
+                        'ConditionExpression': 'attribute_not_exists(dni)'
+                    }
+                }],
+                tenant_id, {rol: 1}
+            )
+        except ClientError as e:
+            if es_usuario_duplicado(e):
+                return respuesta(409, {
+                    'error': f'Ya existe un usuario con dni {dni} registrado como {rol} en este tenant'
+                })
+            if es_admin_duplicado(e):
+                return respuesta(409, {'error': 'Ya existe un administrador registrado para este tenant'})
+            if es_conflicto(e):
+                # Altas simultáneas en el tenant agotaron los reintentos: el cliente puede reintentar
+                logger.warning(f"Conflicto persistente en el conteo de {tenant_id}")
+                return respuesta(503, {'error': 'Demasiadas altas simultáneas en el tenant; reintentar'})
+            raise
+
         logger.info(f"Usuario registrado: {dni} ({rol}) en {tenant_id}")
 
-        return {
-            'statusCode': 200,
-            'body': {
-                'message': 'Usuario registrado exitosamente',
-                'dni': dni,
-                'full_name': full_name,
-                'rol': rol,
-                'detalles': detalles if detalles else {}
-            }
-        }
+        return respuesta(200, {
+            'message': 'Usuario registrado exitosamente',
+            'dni': dni,
+            'full_name': full_name,
+            'rol': rol,
+            'detalles': detalles if detalles else {}
+        })
 
     except KeyError as e:
-        return {
-            'statusCode': 400,
-            'body': {'error': f"Falta el campo requerido: {str(e)}"}
-        }
+        return respuesta(400, {'error': f"Falta el campo requerido: {str(e)}"})
 
     except Exception as e:
         logger.error("Error inesperado", exc_info=True)
-        return {
-            'statusCode': 500,
-            'body': {'error': 'Error interno del servidor', 'detalle': str(e)}
-        }
+        return respuesta(500, {'error': 'Error interno del servidor', 'detalle': str(e)})
@@ -0,0 +1,186 @@
+import os
+import logging
+from botocore.exceptions import ClientError
+from codec import leer_body, respuesta
+from conteo_usuarios import escribir_con_conteo
+from lotes import batch_get
+from paralelo import en_paralelo
+from passwords import hash_password
+from telemetria import instrumentar
+from tenant_cache import buscar_tenant
+from token_auth import validar_token
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Cada fila paga un hash KDF (~100 ms con 1024 MB, ver bench/bench_passwords.py)
+MAX_USUARIOS_LOTE = int(os.environ.get('LOTE_MAX_USUARIOS', 200))
+ROLES_LOTE = ['instructor', 'alumno']
+# TransactWriteItems admite 100 operaciones: 99 altas y la suma del conteo
+MAX_TRANSACCION = 99
+
+def resultado(indice, fila, status, **extra):
+    return {'indice': indice, 'dni': fila.get('dni'), 'rol': fila.get('rol'), 'statusCode': status, **extra}
+
+def validar_fila(fila):
+    """Devuelve el mensaje de error de una fila, o None si es válida."""
+    if not isinstance(fila, dict):
+        return 'Cada usuario debe ser un objeto JSON'
+    if not all(fila.get(campo) for campo in ['dni', 'full_name', 'password', 'rol']):
+        return 'Faltan dni, full_name, password o rol'
+    if not all(isinstance(fila[campo], str) for campo in ['dni', 'full_name', 'password', 'rol']):
+        return 'dni, full_name, password y rol deben ser texto'
+    if 'detalles' in fila and fila['detalles'] is not None and not isinstance(fila['detalles'], dict):
+        return 'El campo "detalles" debe ser un objeto JSON'
+    return None
+
+def escribir_altas(nombre_tabla, tenant_id, items):
+    """Escribe `items` con puts condicionales y el conteo, en transacciones de MAX_TRANSACCION.
+
+    attribute_not_exists cubre al usuario creado por otro request entre el
+    BatchGetItem y la escritura: esa fila no se pisa y la transacción se
+    reintenta sin ella. Devuelve {(tenant_id_rol, dni): status} con 200, 409
+    (ya existía) o 503 (no se pudo escribir).
+    """
+    estados = {}
+    for i in range(0, len(items), MAX_TRANSACCION):
+        pendientes = items[i:i + MAX_TRANSACCION]
+        while pendientes:
+            conteos = {}
+            for item in pendientes:
+                conteos[item['rol']] = conteos.get(item['rol'], 0) + 1
+            operaciones = [{
+                'Put': {
+                    'TableName': nombre_tabla,
+                    'Item': item,
+                    'ConditionExpression': 'attribute_not_exists(dni)'
+                }
+            } for item in pendientes]
+            try:
+                escribir_con_conteo(operaciones, tenant_id, conteos)
+            except ClientError as e:
+                razones = (e.response.get('CancellationReasons') or [])[:len(pendientes)]
+                existentes = {j for j, razon in enumerate(razones) if razon.get('Code') == 'ConditionalCheckFailed'}
+                if not existentes:
+                    # Throttling o conflicto persistente: nada del bloque quedó escrito
+                    logger.warning(f"No se pudo escribir un bloque de {len(pendientes)} usuarios: {str(e)}")
+                    estados.update(((item['tenant_id_rol'], item['dni']), 503) for item in pendientes)
+                    break
+                estados.update(((pendientes[j]['tenant_id_rol'], pendientes[j]['dni']), 409) for j in existentes)
+                pendientes = [item for j, item in enumerate(pendientes) if j not in existentes]
+                continue
+            estados.update(((item['tenant_id_rol'], item['dni']), 200) for item in pendientes)
+            break
+    return estados
+
+@instrumentar
+def lambda_handler(event, context):
+    try:
+        body = leer_body(event)
+        tenant_id = body['tenant_id']
+        usuarios = body['usuarios']
+        token = (event.get('headers') or {}).get('Authorization')
+
+        if not tenant_id or not isinstance(usuarios, list) or not usuarios:
+            return respuesta(400, {'error': 'Se requieren tenant_id y una lista no vacía de usuarios'})
+
+        if len(usuarios) > MAX_USUARIOS_LOTE:
+            return respuesta(400, {'error': f'Máximo {MAX_USUARIOS_LOTE} usuarios por lote'})
+
+        if not token:
+            return respuesta(403, {'error': 'Token requerido para crear usuarios en lote'})
+
+        # ✅ Token y organización se verifican una sola vez para todo el lote, a la vez
+        payload, org = en_paralelo(
+            lambda: validar_token(token, tenant_id),
+            lambda: buscar_tenant(tenant_id)
+        )
+        if payload.get('statusCode') != 200:
+            return respuesta(403, {'error': 'Token inválido o expirado'})
+
+        if payload['body'].get('rol') != 'admin':
+            return respuesta(401, {'error': 'Solo administradores pueden crear usuarios en lote'})
+
+        if org is None:
+            return respuesta(404, {'error': f'Tenant "{tenant_id}" no está registrado'})
+
+        # ✅ Validación por fila (sin I/O)
+        resultados = [None] * len(usuarios)
+        candidatos = {}
+        for indice, fila in enumerate(usuarios):
+            error = validar_fila(fila)
+            if error:
+                resultados[indice] = resultado(indice, fila if isinstance(fila, dict) else {}, 400, error=error)
+                continue
+
+            rol = fila['rol'].lower()
+            if rol == 'admin':
+                # El llamador ya es el admin del tenant: solo puede haber uno
+                resultados[indice] = resultado(indice, fila, 409, error='Ya existe un administrador registrado para este tenant')
+                continue
+            if rol not in ROLES_LOTE:
+                resultados[indice] = resultado(indice, fila, 400, error='Rol inválido: instructor o alumno')
+                continue
+
+            clave = (f"{tenant_id}#{rol}", fila['dni'])
+            if clave in candidatos:
+                resultados[indice] = resultado(indice, fila, 409, error='Usuario duplicado dentro del lote')
+                continue
+            candidatos[clave] = indice
+
+        # ✅ Existencia con BatchGetItem (100 claves por llamada)
+        nombre_tabla = os.environ['TABLE_USER']
+        keys = [{'tenant_id_rol': tid_rol, 'dni': dni} for tid_rol, dni in candidatos]
+        for existente in batch_get(nombre_tabla, keys, ['tenant_id_rol', 'dni']):
+            indice = candidatos.pop((existente['tenant_id_rol'], existente['dni']))
+            fila = usuarios[indice]
+            resultados[indice] = resultado(
+                indice, fila, 409,
+                error=f"Ya existe un usuario con dni {fila['dni']} registrado como {fila['rol'].lower()} en este tenant"
+            )
+
+        # ✅ Escritura con TransactWriteItems (99 altas condicionales + conteo por llamada)
+        items = []
+        for (tenant_id_rol, dni), indice in candidatos.items():
+            fila = usuarios[indice]
+            item = {
+                'tenant_id_rol': tenant_id_rol,
+                'tenant_id': tenant_id,
+                'dni': dni,
+                'full_name': fila['full_name'],
+                'rol': fila['rol'].lower(),
+                'password': hash_password(fila['password'])
+            }
+            if fila.get('detalles') is not None:
+                item['detalles'] = fila['detalles']
+            items.append(item)
+
+        estados = escribir_altas(nombre_tabla, tenant_id, items)
+        for clave, indice in candidatos.items():
+            fila = usuarios[indice]
+            status = estados[clave]
+            if status == 200:
+                resultados[indice] = resultado(indice, fila, 200, message='Usuario registrado exitosamente')
+            elif status == 409:
+                resultados[indice] = resultado(
+                    indice, fila, 409,
+                    error=f"Ya existe un usuario con dni {fila['dni']} registrado como {fila['rol'].lower()} en este tenant"
+                )
+            else:
+                resultados[indice] = resultado(indice, fila, 503, error='No se pudo escribir; reintentar')
+
+        creados = sum(1 for r in resultados if r['statusCode'] == 200)
+        logger.info(f"Lote en {tenant_id}: {creados}/{len(usuarios)} usuarios registrados")
+
+        return respuesta(200, {
+            'creados': creados,
+            'fallidos': len(usuarios) - creados,
+            'resultados': resultados
+        })
+
+    except KeyError as e:
+        return respuesta(400, {'error': f"Falta el campo requerido: {str(e)}"})
+
+    except Exception as e:
+        logger.error("Error inesperado", exc_info=True)
+        return respuesta(500, {'error': 'Error interno del servidor', 'detalle': str(e)})
@@ -1,110 +1,208 @@
-import boto3
 import os
+import hmac
 import json
+import base64
+import hashlib
 import logging
-from boto3.dynamodb.conditions import Key
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key, Attr
+from aws_clients import get_table
+from codec import leer_body, respuesta
+from conteo_usuarios import leer_conteo
+from telemetria import instrumentar
+from token_auth import validar_token
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-dynamodb = boto3.resource('dynamodb')
-lambda_client = boto3.client('lambda')
-
-TABLE_USER = os.environ['TABLE_USER']
-FUNCION_VALIDAR = os.environ['FUNCION_VALIDAR']
-
+LIMIT_DEFAULT = 5
+LIMIT_MAX = 100
+# Con filtros, DynamoDB aplica Limit antes de filtrar: se leen páginas más
+# grandes y se corta en `limit` coincidencias, con un tope de páginas por request
+PAGINA_FILTRO = 100
+MAX_PAGINAS_FILTRO = 10
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+def _unb64(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def _clave_cursor():
+    return os.environ.get('CURSOR_SIGNING_KEY') or os.environ.get('TOKEN_SIGNING_KEY')
+
+def _firmar(mensaje, clave):
+    return _b64(hmac.new(clave.encode(), mensaje.encode(), hashlib.sha256).digest())[:22].encode()
+
+def codificar_cursor(partition_key, dni):
+    """Cursor opaco "<posición>.<firma>" ligado a la partición tenant#rol."""
+    if dni is None:
+        return None
+    clave = _clave_cursor()
+    if not clave:
+        # Sin clave cualquiera podría forjar la posición: no se emiten cursores
+        raise RuntimeError('Falta CURSOR_SIGNING_KEY (o TOKEN_SIGNING_KEY) para paginar')
+    cuerpo = _b64(json.dumps([partition_key, dni], separators=(',', ':')).encode())
+    return f"{cuerpo}.{_firmar(cuerpo, clave).decode()}"
+
+def decodificar_cursor(cursor, partition_key):
+    """Devuelve el ExclusiveStartKey del cursor o lanza ValueError si fue alterado."""
+    clave = _clave_cursor()
+    if not clave or not isinstance(cursor, str):
+        raise ValueError('cursor inválido')
+    cuerpo, _, firma = cursor.partition('.')
+    # Se comparan bytes: compare_digest no acepta str con caracteres no ASCII
+    # (y encode lanza UnicodeError, que es ValueError, con surrogates sueltos)
+    if not cuerpo or not hmac.compare_digest(firma.encode(), _firmar(cuerpo, clave)):
+        raise ValueError('cursor inválido')
+    posicion = json.loads(_unb64(cuerpo))
+    if not isinstance(posicion, list) or len(posicion) != 2:
+        raise ValueError('cursor inválido')
+    particion, dni = posicion
+    if particion != partition_key or not isinstance(dni, str):
+        raise ValueError('cursor de otra consulta')
+    return {'tenant_id_rol': particion, 'dni': dni}
+
+def armar_filtro(nombre, detalles):
+    """FilterExpression para prefijo de nombre y atributos dentro de 'detalles'."""
+    filtro = None
+    if nombre:
+        filtro = Attr('full_name').begins_with(nombre)
+    for campo, valor in (detalles or {}).items():
+        if isinstance(valor, float):
+            valor = Decimal(str(valor))
+        condicion = Attr(f'detalles.{campo}').eq(valor)
+        filtro = condicion if filtro is None else filtro & condicion
+    return filtro
+
+def armar_proyeccion(fields):
+    """ProjectionExpression sin 'password'; siempre incluye dni (clave del cursor)."""
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    campos = [c.strip() for c in fields or [] if isinstance(c, str) and c.strip() and c.strip() != 'password']
+    if not campos:
+        return {}
+    if 'dni' not in campos:
+        campos.append('dni')
+    nombres = {f"#f{i}": campo for i, campo in enumerate(campos)}
+    return {
+        'ProjectionExpression': ', '.join(nombres),
+        'ExpressionAttributeNames': nombres
+    }
+
+def contar(tabla, query_args):
+    """Total de coincidencias con Select=COUNT: recorre la partición sin transferir items."""
+    query_args = {**query_args, 'Select': 'COUNT'}
+    total = 0
+    while True:
+        result = tabla.query(**query_args)
+        total += result['Count']
+        if 'LastEvaluatedKey' not in result:
+            return total
+        query_args['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+def listar(tabla, query_args, limit, filtrado):
+    """Hasta `limit` items y el dni desde el que continúa la siguiente página (o None)."""
+    items = []
+    for _ in range(MAX_PAGINAS_FILTRO if filtrado else 1):
+        pagina = PAGINA_FILTRO if filtrado else limit - len(items)
+        result = tabla.query(**query_args, Limit=pagina)
+        items.extend(result.get('Items', []))
+        last_key = result.get('LastEvaluatedKey')
+
+        if len(items) >= limit:
+            # Se corta en el último item devuelto, que es una posición válida
+            items = items[:limit]
+            return items, items[-1]['dni']
+        if not last_key:
+            return items, None
+        query_args['ExclusiveStartKey'] = last_key
+    return items, last_key['dni']
+
+@instrumentar
 def lambda_handler(event, context):
     try:
         token = event['headers'].get('Authorization')
 
         # Verificar que body existe
         if 'body' not in event or event['body'] is None:
-            return {
-                'statusCode': 400,
-                'body': {'error': 'Falta el body'}
-            }
+            return respuesta(400, {'error': 'Falta el body'})
 
         # Parsear body si es string
-        body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+        body = leer_body(event)
 
         tenant_id = body.get('tenant_id')
         rol = body.get('rol', '').lower()
-        last_dni = body.get('last_dni')
         try:
-            limit = int(body.get('limit', 5))
+            limit = min(max(int(body.get('limit', LIMIT_DEFAULT)), 1), LIMIT_MAX)
         except (ValueError, TypeError):
-            limit = 5
+            limit = LIMIT_DEFAULT
 
         if not token or not tenant_id:
-            return {
-                'statusCode': 404,
-                'body': {'error': 'Token y tenant_id son requeridos'}
-            }
+            return respuesta(404, {'error': 'Token y tenant_id son requeridos'})
 
         if rol not in ['instructor', 'alumno']:
-            return {
-                'statusCode': 400,
-                'body': {'error': 'Parámetro rol requerido: instructor o alumno'}
-            }
-
-        # Validar token con Lambda externa
-        validar_response = lambda_client.invoke(
-            FunctionName=FUNCION_VALIDAR,
-            InvocationType='RequestResponse',
-            Payload=json.dumps({'body': {'token': token, 'tenant_id': tenant_id}})
-        )
-        payload = json.loads(validar_response['Payload'].read())
+            return respuesta(400, {'error': 'Parámetro rol requerido: instructor o alumno'})
+
+        detalles = body.get('detalles')
+        if detalles is not None and not isinstance(detalles, dict):
+            return respuesta(400, {'error': 'El filtro "detalles" debe ser un objeto JSON'})
+
+        # Validar token en proceso (sin invocar la Lambda validar)
+        payload = validar_token(token, tenant_id)
         if payload.get('statusCode') != 200:
-            mensaje = 'Token inválido o expirado'
-            try:
-                mensaje = json.loads(payload['body'])['error']
-            except Exception:
-                pass
-            return {
-                'statusCode': 403,
-                'body': {'error': mensaje}
-            }
-
-        usuario = json.loads(payload['body']) if isinstance(payload['body'], str) else payload['body']
+            mensaje = payload['body'].get('error', 'Token inválido o expirado')
+            return respuesta(403, {'error': mensaje})
+
+        usuario = payload['body']
         if usuario.get('rol', '').lower() != 'admin':
-            return {
-                'statusCode': 404,
-                'body': {'error': 'Solo administradores pueden listar usuarios'}
-            }
+            return respuesta(404, {'error': 'Solo administradores pueden listar usuarios'})
 
         # Consulta a DynamoDB
         partition_key = f"{tenant_id}#{rol}"
-        condition = Key('tenant_id_rol').eq(partition_key)
-        if last_dni:
-            condition &= Key('dni').gt(last_dni)
-
-        tabla = dynamodb.Table(TABLE_USER)
-        result = tabla.query(
-            KeyConditionExpression=condition,
-            Limit=limit
-        )
-
-        items = result.get('Items', [])
-        last_dni_return = items[-1]['dni'] if items else None
-
-        return {
-            'statusCode': 200,
-            'body': {
-                'usuarios': items,
-                'last_dni': last_dni_return
-            }
+        query_args = {
+            'KeyConditionExpression': Key('tenant_id_rol').eq(partition_key),
+            'ConsistentRead': bool(body.get('consistente', False))
         }
+        filtro = armar_filtro(body.get('nombre'), detalles)
+        if filtro is not None:
+            query_args['FilterExpression'] = filtro
+
+        tabla = get_table('TABLE_USER')
+
+        # ✅ Solo el total: sin filtros sale del item de conteo (O(1)), con filtros Select=COUNT
+        if body.get('count_only'):
+            if filtro is None:
+                conteos = leer_conteo(tenant_id)
+                return respuesta(200, {'total': conteos[rol], 'por_rol': conteos})
+            return respuesta(200, {'total': contar(tabla, query_args)})
+
+        if body.get('cursor'):
+            try:
+                query_args['ExclusiveStartKey'] = decodificar_cursor(body['cursor'], partition_key)
+            except ValueError:
+                return respuesta(400, {'error': 'Parámetro cursor inválido'})
+
+        query_args.update(armar_proyeccion(body.get('fields')))
+        items, siguiente = listar(tabla, query_args, limit, filtro is not None)
+        for item in items:
+            item.pop('password', None)
+
+        try:
+            cursor = codificar_cursor(partition_key, siguiente)
+        except RuntimeError as e:
+            logger.error(str(e))
+            return respuesta(500, {'error': 'Paginación no configurada: falta la clave de firma de cursores'})
+
+        return respuesta(200, {
+            'usuarios': items,
+            'cursor': cursor
+        })
 
     except KeyError as ke:
         logger.error(f"Falta campo requerido: {ke}", exc_info=True)
-        return {
-            'statusCode': 400,
-            'body': {'error': f'Falta campo requerido: {str(ke)}'}
-        }
+        return respuesta(400, {'error': f'Falta campo requerido: {str(ke)}'})
 
     except Exception as e:
         logger.error("Error inesperado", exc_info=True)
-        return {
-            'statusCode': 500,
-            'body': {'error': 'Error interno', 'detalle': str(e)}
-        }
+        return respuesta(500, {'error': 'Error interno', 'detalle': str(e)})
@@ -1,106 +1,139 @@
-import boto3
-import hashlib
 import uuid
-import os
-import json
 import logging
 from datetime import datetime, timedelta, timezone
+from botocore.exceptions import ClientError
+from aws_clients import get_table
+from codec import leer_body, respuesta
+from conteo_usuarios import ROLES
+from indice_usuarios import buscar_por_dni
+from passwords import hash_password, verificar_password
+from telemetria import instrumentar
+from tenant_cache import config_sesion
+from token_auth import ATRIBUTO_TTL, TOKEN_FORMAT, emitir_token_firmado, tabla_tokens
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+def rehash_password(tabla, key, password, anterior):
+    """Reemplaza un hash legado o de costo antiguo; el login no falla si esto falla."""
+    try:
+        tabla.update_item(
+            Key=key,
+            UpdateExpression='SET #pw = :nuevo',
+            ConditionExpression='#pw = :anterior',
+            ExpressionAttributeNames={'#pw': 'password'},
+            ExpressionAttributeValues={':nuevo': hash_password(password), ':anterior': anterior}
+        )
+        logger.info(f"Password re-hasheado para {key['dni']}")
+    except ClientError as e:
+        # Otro login o un cambio de password ya lo actualizó
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            logger.warning(f"No se pudo re-hashear el password de {key['dni']}: {str(e)}")
 
+@instrumentar
 def lambda_handler(event, context):
     try:
         # Manejo del preflight OPTIONS
         if event.get('httpMethod') == 'OPTIONS':
-            return {
-                'statusCode': 200,
-                'body': {'message': 'Preflight OK'}
-            }
+            return respuesta(200, {'message': 'Preflight OK'})
 
         # Parsear body si viene como string
-        body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+        body = leer_body(event)
 
         tenant_id = body.get('tenant_id')
         dni = body.get('dni')
         password = body.get('password')
         rol = body.get('rol', '').lower()
 
-        if not all([tenant_id, dni, password, rol]):
-            return {
-                'statusCode': 400,
-                'body': {'error': 'Faltan tenant_id, dni, password o rol'}
-            }
+        if not all([tenant_id, dni, password]):
+            return respuesta(400, {'error': 'Faltan tenant_id, dni o password'})
 
-        tenant_id_rol = f"{tenant_id}#{rol}"
-        hashed_password = hash_password(password)
+        if rol and rol not in ROLES:
+            return respuesta(400, {'error': 'Rol inválido: admin, instructor o alumno'})
 
-        dynamodb = boto3.resource('dynamodb')
-        t_usuarios = dynamodb.Table(os.environ["TABLE_USER"])
-        t_tokens = dynamodb.Table(os.environ["TABLE_TOKEN"])
+        t_usuarios = get_table('TABLE_USER')
+        t_tokens = tabla_tokens()
 
-        response = t_usuarios.get_item(
-            Key={
-                'tenant_id_rol': tenant_id_rol,
+        if rol:
+            key = {
+                'tenant_id_rol': f"{tenant_id}#{rol}",
                 'dni': dni
             }
-        )
-
-        if 'Item' not in response:
-            return {
-                'statusCode': 403,
-                'body': {'error': 'Usuario no existe o rol incorrecto'}
+            response = t_usuarios.get_item(Key=key)
+
+            if 'Item' not in response:
+                return respuesta(403, {'error': 'Usuario no existe o rol incorrecto'})
+
+            usuario = response['Item']
+            valido, necesita_rehash = verificar_password(password, usuario['password'])
+            if not valido:
+                return respuesta(403, {'error': 'Password incorrecto'})
+        else:
+            # ✅ Login sin rol: un query al índice por dni y se usa el rol cuyo password coincide
+            candidatos = buscar_por_dni(tenant_id, dni)
+            if not candidatos:
+                return respuesta(403, {'error': 'Usuario no existe'})
+
+            validos = []
+            for candidato in candidatos:
+                valido, rehash = verificar_password(password, candidato['password'])
+                if valido:
+                    validos.append((candidato, rehash))
+            if not validos:
+                return respuesta(403, {'error': 'Password incorrecto'})
+            if len(validos) > 1:
+                return respuesta(409, {
+                    'error': 'El usuario tiene más de un rol: indique rol',
+                    'roles': sorted(candidato['rol'] for candidato, _ in validos)
+                })
+
+            usuario, necesita_rehash = validos[0]
+            rol = usuario['rol']
+            key = {
+                'tenant_id_rol': usuario['tenant_id_rol'],
+                'dni': dni
             }
 
-        usuario = response['Item']
-        if usuario['password'] != hashed_password:
-            return {
-                'statusCode': 403,
-                'body': {'error': 'Password incorrecto'}
-            }
+        # ✅ Migración transparente de sha256 legado (o costo anterior) al KDF actual
+        if necesita_rehash:
+            rehash_password(t_usuarios, key, password, usuario['password'])
 
-        token = str(uuid.uuid4())
+        duracion, _ = config_sesion(tenant_id)
         now = datetime.now(timezone.utc)
-        expiracion = now + timedelta(hours=1)
+        expiracion = now + timedelta(seconds=duracion)
         expiracion_str = expiracion.strftime('%Y-%m-%dT%H:%M:%SZ')
 
         full_name = usuario.get('full_name', '')
 
-        t_tokens.put_item(
-            Item={
-                'tenant_id': tenant_id,
-                'token': token,
-                'dni': dni,
-                'full_name': full_name,
-                'rol': rol,
-                'expires_at': expiracion_str
-            }
-        )
+        if TOKEN_FORMAT == 'firmado':
+            # Token autocontenido: se valida sin leer t_token
+            token = emitir_token_firmado(tenant_id, dni, full_name, rol, expiracion)
+        else:
+            token = str(uuid.uuid4())
+            t_tokens.put_item(
+                Item={
+                    'tenant_id': tenant_id,
+                    'token': token,
+                    'dni': dni,
+                    'full_name': full_name,
+                    'rol': rol,
+                    ATRIBUTO_TTL: int(expiracion.timestamp())
+                }
+            )
 
         logger.info(f"Login exitoso para {dni} en {tenant_id} con rol {rol}")
 
-        return {
-            'statusCode': 200,
-            'body': {
-                'message': 'Login exitoso',
-                'token': token,
-                'expires_at': expiracion_str
-            }
-        }
+        return respuesta(200, {
+            'message': 'Login exitoso',
+            'token': token,
+            'rol': rol,
+            'expires_at': expiracion_str
+        })
 
     except KeyError as e:
         logger.warning(f"Campo faltante: {str(e)}")
-        return {
-            'statusCode': 400,
-            'body': {'error': f'Falta el campo requerido: {str(e)}'}
-        }
+        return respuesta(400, {'error': f'Falta el campo requerido: {str(e)}'})
 
     except Exception as e:
         logger.error("Error inesperado", exc_info=True)
-        return {
-            'statusCode': 500,
-            'body': {'error': str(e)}
-        }
+        return respuesta(500, {'error': str(e)})
@@ -1,48 +1,43 @@
-import boto3
-import os
-import json
 import logging
+from codec import leer_body, respuesta
+from telemetria import instrumentar
+from token_auth import invalidar_token, es_token_firmado, es_clave_reservada, revocar_token_firmado, tabla_tokens
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+@instrumentar
 def lambda_handler(event, context):
     try:
-        # Asegurar que el body esté parseado si viene como string
-        if isinstance(event['body'], str):
-            event['body'] = json.loads(event['body'])
-
-        body = event['body']
+        body = leer_body(event)
         tenant_id = body['tenant_id']
         token = body['token']
 
         if not tenant_id or not token:
-            return {
-                'statusCode': 400,
-                'body': json.dumps({'error': 'Se requieren tenant_id y token'})
-            }
+            return respuesta(400, {'error': 'Se requieren tenant_id y token'})
 
-        # Eliminar el token de la tabla
-        dynamodb = boto3.resource('dynamodb')
-        t_tokens = dynamodb.Table(os.environ["TABLE_TOKEN"])
+        # La lista de revocados comparte tabla: un logout no puede borrar sus items
+        if es_clave_reservada(tenant_id, token):
+            return respuesta(403, {'error': 'Token no existe'})
 
-        t_tokens.delete_item(
-            Key={
-                'tenant_id': tenant_id,
-                'token': token
-            }
-        )
+        # Eliminar el token de la tabla
+        if es_token_firmado(token):
+            # Los tokens firmados no están en la tabla: se revocan hasta que expiren
+            revocar_token_firmado(tenant_id, token)
+        else:
+            tabla_tokens().delete_item(
+                Key={
+                    'tenant_id': tenant_id,
+                    'token': token
+                }
+            )
+
+        invalidar_token(tenant_id, token)
 
         logger.info(f"Logout exitoso para token {token} del tenant {tenant_id}")
 
-        return {
-            'statusCode': 200,
-            'body': json.dumps({'message': 'Logout exitoso'})
-        }
+        return respuesta(200, {'message': 'Logout exitoso'})
 
     except Exception as e:
         logger.error("Error inesperado en logout", exc_info=True)
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
-        }
+        return respuesta(500, {'error': str(e)})
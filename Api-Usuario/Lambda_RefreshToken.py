@@ -0,0 +1,144 @@
+import time
+import uuid
+import logging
+from datetime import datetime, timezone
+from botocore.exceptions import ClientError
+from codec import leer_body, respuesta
+from telemetria import instrumentar
+from tenant_cache import config_sesion
+from token_auth import (ATRIBUTO_TTL, formato_iso, exp_registro, validar_token, invalidar_token,
+                        es_token_firmado, es_clave_reservada, emitir_token_firmado, revocar_token_firmado,
+                        tabla_tokens)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def es_condicion_fallida(e):
+    return e.response['Error']['Code'] in ['ConditionalCheckFailedException', 'TransactionCanceledException']
+
+def fuera_de_ventana(exp, ventana):
+    return respuesta(409, {
+        'error': 'El token aún no está en su ventana de renovación',
+        'refresh_desde': formato_iso(exp - ventana)
+    })
+
+def extender(t_tokens, tenant_id, token, ahora, nuevo_exp, ventana):
+    """Extiende la expiración del mismo token con un único update_item condicional.
+
+    La condición exige que el token exista, no haya expirado y esté dentro de la
+    ventana. Los registros legados ('expires_at' en texto) se migran a 'exp'.
+    """
+    t_tokens.update_item(
+        Key={'tenant_id': tenant_id, 'token': token},
+        UpdateExpression='SET #exp = :nuevo REMOVE expires_at',
+        ConditionExpression=(
+            '(#exp > :ahora AND #exp <= :limite) OR '
+            '(attribute_not_exists(#exp) AND expires_at > :ahora_iso AND expires_at <= :limite_iso)'
+        ),
+        ExpressionAttributeNames={'#exp': ATRIBUTO_TTL},
+        ExpressionAttributeValues={
+            ':nuevo': nuevo_exp,
+            ':ahora': ahora,
+            ':limite': ahora + ventana,
+            ':ahora_iso': formato_iso(ahora),
+            ':limite_iso': formato_iso(ahora + ventana)
+        }
+    )
+    return token
+
+def rotar(t_tokens, tenant_id, token, usuario, nuevo_exp):
+    """Reemplaza el token por uno nuevo: borra el anterior y crea el nuevo en una transacción."""
+    nuevo = str(uuid.uuid4())
+    t_tokens.meta.client.transact_write_items(
+        TransactItems=[
+            {
+                'Delete': {
+                    'TableName': t_tokens.name,
+                    'Key': {'tenant_id': tenant_id, 'token': token},
+                    'ConditionExpression': 'attribute_exists(#tok)',
+                    'ExpressionAttributeNames': {'#tok': 'token'}
+                }
+            },
+            {
+                'Put': {
+                    'TableName': t_tokens.name,
+                    'Item': {
+                        'tenant_id': tenant_id,
+                        'token': nuevo,
+                        'dni': usuario['dni'],
+                        'full_name': usuario['full_name'],
+                        'rol': usuario['rol'],
+                        ATRIBUTO_TTL: nuevo_exp
+                    }
+                }
+            }
+        ]
+    )
+    return nuevo
+
+@instrumentar
+def lambda_handler(event, context):
+    try:
+        body = leer_body(event)
+
+        tenant_id = body.get('tenant_id')
+        token = body.get('token')
+        rotar_token = bool(body.get('rotar', False))
+
+        if not tenant_id or not token:
+            return respuesta(400, {'error': 'Se requieren tenant_id y token'})
+
+        # El update condicional de `extender` no distingue sesiones de revocados
+        if es_clave_reservada(tenant_id, token):
+            return respuesta(403, {'error': 'Token no existe'})
+
+        duracion, ventana = config_sesion(tenant_id)
+        ahora = int(time.time())
+        nuevo_exp = ahora + duracion
+        t_tokens = tabla_tokens()
+
+        if es_token_firmado(token) or rotar_token:
+            # Se necesitan los datos del usuario para emitir el nuevo token
+            payload = validar_token(token, tenant_id)
+            if payload.get('statusCode') != 200:
+                return respuesta(403, payload['body'])
+
+            usuario = payload['body']
+            exp = exp_registro(usuario)
+            if exp - ahora > ventana:
+                return fuera_de_ventana(exp, ventana)
+
+            if es_token_firmado(token):
+                expiracion = datetime.fromtimestamp(nuevo_exp, timezone.utc)
+                nuevo = emitir_token_firmado(tenant_id, usuario['dni'], usuario['full_name'], usuario['rol'], expiracion)
+                if rotar_token:
+                    revocar_token_firmado(tenant_id, token)
+            else:
+                nuevo = rotar(t_tokens, tenant_id, token, usuario, nuevo_exp)
+        else:
+            nuevo = extender(t_tokens, tenant_id, token, ahora, nuevo_exp, ventana)
+
+        invalidar_token(tenant_id, token)
+        logger.info(f"Token renovado en {tenant_id} (rotado={nuevo != token})")
+
+        return respuesta(200, {
+            'message': 'Token renovado',
+            'token': nuevo,
+            'expires_at': formato_iso(nuevo_exp)
+        })
+
+    except ClientError as e:
+        if not es_condicion_fallida(e):
+            logger.error("Error inesperado en refresh", exc_info=True)
+            return respuesta(500, {'error': 'Error interno del servidor', 'detalle': str(e)})
+
+        # La condición falló: averiguar si el token no existe, expiró o aún no está en ventana
+        invalidar_token(tenant_id, token)
+        payload = validar_token(token, tenant_id)
+        if payload.get('statusCode') != 200:
+            return respuesta(403, payload['body'])
+        return fuera_de_ventana(exp_registro(payload['body']), ventana)
+
+    except Exception as e:
+        logger.error("Error inesperado en refresh", exc_info=True)
+        return respuesta(500, {'error': 'Error interno del servidor', 'detalle': str(e)})
@@ -0,0 +1,74 @@
+"""Lectura de requests y armado de respuestas común a todos los handlers.
+
+Con `integration: lambda` API Gateway entrega el body ya parseado (dict) y el
+runtime de Lambda serializa el dict devuelto con su propio encoder, que no se
+puede reemplazar y emite los Decimal de DynamoDB como float (`9200.0`). Por eso
+`respuesta` entrega un body que ya tiene solo tipos JSON nativos: con orjson
+(empaquetado en todas las funciones, ver serverless.yml) la conversión es una
+pasada en C; sin orjson se recorre el body en Python. `dumps`/`loads` se usan
+donde los handlers producen o leen JSON como texto (mensajes SQS, cursores).
+"""
+import json
+import base64
+from decimal import Decimal
+
+try:
+    import orjson  # opcional: fuera del paquete (tests, scripts) se usa json
+except ImportError:
+    orjson = None
+
+def _default(obj):
+    # Solo se llama para tipos que el encoder no conoce: sin copiar la estructura
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Type {type(obj)} not serializable')
+
+def dumps(obj):
+    """JSON compacto como str; convierte Decimal (DynamoDB) a int o float."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default).decode()
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':'))
+
+def a_json(obj):
+    """Copia de `obj` con solo tipos JSON nativos, con las reglas de `dumps`."""
+    if orjson is not None:
+        # Ida y vuelta en C: ~2.5x más rápido que el recorrido en Python en un listado
+        return orjson.loads(orjson.dumps(obj, default=_default))
+    if isinstance(obj, dict):
+        return {k: a_json(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return [a_json(v) for v in obj]
+    if isinstance(obj, Decimal):
+        return _default(obj)
+    return obj
+
+def loads(texto):
+    if orjson is not None:
+        return orjson.loads(texto)
+    return json.loads(texto)
+
+def leer_body(event):
+    """Body del request como dict, venga parseado, como texto JSON o en base64.
+
+    Los decimales del texto se leen como Decimal (DynamoDB no acepta float).
+    """
+    body = event.get('body')
+    if body is None:
+        return {}
+    if isinstance(body, (str, bytes)):
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body)
+        return json.loads(body, parse_float=Decimal) if body else {}
+    return body
+
+def leer_query(event):
+    """Parámetros de query string (event['query'] con integración Lambda)."""
+    return event.get('query') or event.get('queryStringParameters') or {}
+
+def respuesta(status, body):
+    return {
+        'statusCode': status,
+        'body': a_json(body)
+    }
@@ -0,0 +1,169 @@
+import os
+import time
+import random
+import logging
+from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import Key
+from aws_clients import get_table
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Item agregado por tenant en t_usuario: {'admin': n, 'instructor': n, 'alumno': n}
+# en la clave ('<tenant>#_conteo', 'conteo'). '_conteo' no es un rol, así que
+# ninguna clave de usuario ('<tenant>#<rol>') coincide con la del conteo siempre
+# que todo acceso por clave valide el rol contra ROLES.
+ROLES = ['admin', 'instructor', 'alumno']
+ROL_CONTEO = '_conteo'
+DNI_CONTEO = 'conteo'
+# Clave anterior ('conteo#<tenant>', 'conteo'): chocaba con el tenant 'conteo'
+PREFIJO_CONTEO_LEGADO = 'conteo#'
+# Todas las altas del tenant escriben el mismo item de conteo: dos transacciones
+# simultáneas se cancelan con TransactionConflict, que el SDK no reintenta
+REINTENTOS_CONFLICTO = int(os.environ.get('CONTEO_REINTENTOS', '4'))
+ESPERA_CONFLICTO = 0.05
+
+def clave_conteo(tenant_id):
+    return {'tenant_id_rol': f"{tenant_id}#{ROL_CONTEO}", 'dni': DNI_CONTEO}
+
+def es_item_conteo(item):
+    """True para un item de conteo (actual o legado): a diferencia de los usuarios, no tiene 'rol'."""
+    return item.get('dni') == DNI_CONTEO and 'rol' not in item
+
+def _es_condicion_fallida(error):
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+def es_conflicto(error):
+    """True si la escritura chocó con otra transacción sobre el mismo item."""
+    if error.response['Error']['Code'] == 'TransactionConflictException':
+        return True
+    razones = error.response.get('CancellationReasons') or []
+    return any(razon.get('Code') == 'TransactionConflict' for razon in razones)
+
+def _esperar_conflicto(intento):
+    # Backoff exponencial con jitter completo: las altas concurrentes no reintentan a la vez
+    time.sleep(random.uniform(0, ESPERA_CONFLICTO * 2 ** intento))
+
+def sembrar_conteo(tenant_id):
+    """Crea el item de conteo a partir de los usuarios existentes (Select=COUNT).
+
+    No pisa un conteo existente: si otro request lo creó primero, devuelve ese.
+    """
+    tabla = get_table('TABLE_USER')
+    conteos = {}
+    for rol in ROLES:
+        kwargs = {'KeyConditionExpression': Key('tenant_id_rol').eq(f"{tenant_id}#{rol}"), 'Select': 'COUNT'}
+        conteos[rol] = 0
+        while True:
+            response = tabla.query(**kwargs)
+            conteos[rol] += response['Count']
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    try:
+        tabla.put_item(
+            Item={**clave_conteo(tenant_id), **conteos},
+            ConditionExpression='attribute_not_exists(dni)'
+        )
+        logger.info(f"Conteo de usuarios inicializado para {tenant_id}: {conteos}")
+        return conteos
+    except ClientError as e:
+        if not _es_condicion_fallida(e):
+            raise
+        return leer_conteo(tenant_id)
+
+def leer_conteo(tenant_id):
+    """Usuarios por rol del tenant con un solo get_item (O(1))."""
+    item = get_table('TABLE_USER').get_item(Key=clave_conteo(tenant_id), ConsistentRead=True).get('Item')
+    if item is None:
+        return sembrar_conteo(tenant_id)
+    return {rol: int(item.get(rol, 0)) for rol in ROLES}
+
+def actualizacion_conteo(tenant_id, conteos):
+    """Operación Update de TransactWriteItems que suma `conteos` ({rol: n}).
+
+    Exige que el conteo exista (ver sembrar_conteo) y, si se suma un admin,
+    que el tenant aún no tenga uno: esa condición reemplaza el query de unicidad.
+    """
+    nombres = {f"#r{i}": rol for i, rol in enumerate(conteos)}
+    valores = {f":n{i}": n for i, n in enumerate(conteos.values())}
+    condicion = 'attribute_exists(dni)'
+    if 'admin' in conteos:
+        clave = next(k for k, v in nombres.items() if v == 'admin')
+        condicion += f' AND (attribute_not_exists({clave}) OR {clave} = :cero)'
+        valores[':cero'] = 0
+    return {
+        'Update': {
+            'TableName': get_table('TABLE_USER').name,
+            'Key': clave_conteo(tenant_id),
+            'UpdateExpression': 'ADD ' + ', '.join(f"{k} :n{i}" for i, k in enumerate(nombres)),
+            'ConditionExpression': condicion,
+            'ExpressionAttributeNames': nombres,
+            'ExpressionAttributeValues': valores,
+            'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+        }
+    }
+
+def escribir_con_conteo(operaciones, tenant_id, conteos):
+    """Ejecuta `operaciones` y la suma del conteo en una sola transacción.
+
+    Si el tenant aún no tiene conteo lo siembra y reintenta una vez, y ante un
+    TransactionConflict reintenta hasta REINTENTOS_CONFLICTO veces con backoff.
+    Cualquier otra cancelación (o el conflicto persistente, ver es_conflicto) se
+    propaga como ClientError; la razón de la operación de conteo es la última
+    de CancellationReasons.
+    """
+    client = get_table('TABLE_USER').meta.client
+    sembrado = False
+    conflictos = 0
+    while True:
+        try:
+            client.transact_write_items(TransactItems=[*operaciones, actualizacion_conteo(tenant_id, conteos)])
+            return
+        except ClientError as e:
+            razones = e.response.get('CancellationReasons') or []
+            razon_conteo = razones[-1] if len(razones) == len(operaciones) + 1 else {}
+            # Condición fallida sin item: el conteo no existe todavía
+            if not sembrado and razon_conteo.get('Code') == 'ConditionalCheckFailed' and not razon_conteo.get('Item'):
+                sembrar_conteo(tenant_id)
+                sembrado = True
+                continue
+            if es_conflicto(e) and conflictos < REINTENTOS_CONFLICTO:
+                _esperar_conflicto(conflictos)
+                conflictos += 1
+                continue
+            raise
+
+def es_admin_duplicado(error):
+    """True si la transacción se canceló porque el tenant ya tiene admin."""
+    razones = error.response.get('CancellationReasons') or []
+    if not razones or razones[-1].get('Code') != 'ConditionalCheckFailed':
+        return False
+    # Los errores no pasan por la deserialización de boto3: {'N': '1'}
+    admin = (razones[-1].get('Item') or {}).get('admin', {'N': '0'})
+    return int(admin['N'] if isinstance(admin, dict) else admin) > 0
+
+def borrar_conteos_legados():
+    """Borra los conteos con la clave anterior; se vuelven a sembrar en la clave nueva."""
+    tabla = get_table('TABLE_USER')
+    borrados = 0
+    kwargs = {
+        'FilterExpression': 'begins_with(tenant_id_rol, :prefijo) AND dni = :dni AND attribute_not_exists(rol)',
+        'ExpressionAttributeValues': {':prefijo': PREFIJO_CONTEO_LEGADO, ':dni': DNI_CONTEO},
+        'ProjectionExpression': 'tenant_id_rol, dni'
+    }
+    while True:
+        response = tabla.scan(**kwargs)
+        for item in response.get('Items', []):
+            tabla.delete_item(Key={'tenant_id_rol': item['tenant_id_rol'], 'dni': item['dni']})
+            borrados += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return borrados
+
+if __name__ == '__main__':
+    # Migración: TABLE_USER=dev-t_usuario python conteo_usuarios.py
+    logging.basicConfig()
+    print(f"Conteos con la clave anterior borrados: {borrar_conteos_legados()}")
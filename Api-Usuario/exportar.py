@@ -0,0 +1,203 @@
+"""Exportación de usuarios y organizaciones a NDJSON comprimido con gzip.
+
+    TABLE_USER=dev-t_usuario TABLE_ORG=dev-t_org python exportar.py usuarios.ndjson.gz --tenant t1
+    TABLE_USER=dev-t_usuario TABLE_ORG=dev-t_org python exportar.py s3://bucket/export.ndjson.gz --segmentos 8
+
+Cada línea es {"tipo": "usuario" | "organizacion", "item": {...}} sin 'password'.
+Con --tenant se leen las particiones tenant#rol con queries paginados y el item
+del tenant en t_org; sin --tenant se hace un scan paralelo de ambas tablas (el
+item de conteo por tenant se omite). La memoria queda acotada: se escribe página
+por página y los segmentos del scan entregan sus páginas por una cola de tamaño
+fijo. Un destino s3:// se sube por multipart; AWS_ENDPOINT_URL_S3 permite usar
+un S3 compatible (MinIO, moto).
+"""
+import sys
+import gzip
+import time
+import queue
+import logging
+import argparse
+import threading
+from boto3.dynamodb.conditions import Key
+from aws_clients import get_table, get_s3_client
+from codec import dumps
+from conteo_usuarios import ROLES, es_item_conteo
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SECRETOS = ('password',)
+PAGINA = 500
+# S3 exige al menos 5 MB por parte salvo la última
+PARTE_S3 = 8 * 1024 * 1024
+REPORTE_SEGUNDOS = 5
+
+class SubidaS3:
+    """Destino de solo escritura que sube a S3 por multipart, una parte por vez."""
+
+    def __init__(self, bucket, key):
+        self.s3 = get_s3_client()
+        self.destino = {'Bucket': bucket, 'Key': key}
+        self.upload_id = self.s3.create_multipart_upload(**self.destino)['UploadId']
+        self.partes = []
+        self.buffer = bytearray()
+        self.escritos = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.escritos += len(data)
+        if len(self.buffer) >= PARTE_S3:
+            self._subir_parte()
+        return len(data)
+
+    def _subir_parte(self):
+        numero = len(self.partes) + 1
+        response = self.s3.upload_part(**self.destino, UploadId=self.upload_id,
+                                       PartNumber=numero, Body=bytes(self.buffer))
+        self.partes.append({'ETag': response['ETag'], 'PartNumber': numero})
+        self.buffer = bytearray()
+
+    def tell(self):
+        return self.escritos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.buffer or not self.partes:
+            self._subir_parte()
+        self.s3.complete_multipart_upload(**self.destino, UploadId=self.upload_id,
+                                          MultipartUpload={'Parts': self.partes})
+
+    def abortar(self):
+        self.s3.abort_multipart_upload(**self.destino, UploadId=self.upload_id)
+
+def abrir_destino(destino):
+    if destino.startswith('s3://'):
+        bucket, _, key = destino[len('s3://'):].partition('/')
+        if not bucket or not key:
+            raise ValueError(f'Destino S3 inválido: {destino}')
+        return SubidaS3(bucket, key)
+    return open(destino, 'wb')
+
+def paginas_query(tabla, condicion):
+    kwargs = {'KeyConditionExpression': condicion, 'Limit': PAGINA}
+    while True:
+        response = tabla.query(**kwargs)
+        yield response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def paginas_scan(tabla, segmentos):
+    """Páginas de un scan paralelo en el orden en que llegan.
+
+    La cola acotada frena a los segmentos cuando la compresión va más lenta que
+    la lectura, así nunca hay más de 2 páginas por segmento en memoria.
+    """
+    cola = queue.Queue(maxsize=segmentos * 2)
+
+    # meta.client es thread-safe (el recurso Table no) y ya deserializa los tipos
+    client = tabla.meta.client
+
+    def leer_segmento(segmento):
+        try:
+            kwargs = {'TableName': tabla.name, 'Segment': segmento, 'TotalSegments': segmentos, 'Limit': PAGINA}
+            while True:
+                response = client.scan(**kwargs)
+                cola.put(response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            cola.put(None)
+        except Exception as e:
+            cola.put(e)
+
+    for segmento in range(segmentos):
+        threading.Thread(target=leer_segmento, args=(segmento,), daemon=True).start()
+
+    terminados = 0
+    while terminados < segmentos:
+        pagina = cola.get()
+        if pagina is None:
+            terminados += 1
+        elif isinstance(pagina, Exception):
+            raise pagina
+        else:
+            yield pagina
+
+def fuentes(tenant_id, segmentos):
+    """(tipo, páginas de items) de cada tabla a exportar."""
+    t_usuarios = get_table('TABLE_USER')
+    t_org = get_table('TABLE_ORG')
+    if tenant_id:
+        for rol in ROLES:
+            yield 'usuario', paginas_query(t_usuarios, Key('tenant_id_rol').eq(f"{tenant_id}#{rol}"))
+        org = t_org.get_item(Key={'tenant_id': tenant_id}).get('Item')
+        if org is None:
+            logger.warning(f"El tenant {tenant_id} no existe en t_org")
+        yield 'organizacion', [[org]] if org else []
+    else:
+        yield 'usuario', paginas_scan(t_usuarios, segmentos)
+        yield 'organizacion', paginas_scan(t_org, segmentos)
+
+def resumen(progreso):
+    segundos = max(time.perf_counter() - progreso['inicio'], 1e-6)
+    total = progreso['usuario'] + progreso['organizacion']
+    return {
+        'usuarios': progreso['usuario'],
+        'organizaciones': progreso['organizacion'],
+        'bytes_ndjson': progreso['bytes'],
+        'segundos': round(segundos, 2),
+        'items_por_segundo': round(total / segundos, 1),
+        'mb_por_segundo': round(progreso['bytes'] / segundos / 1e6, 2)
+    }
+
+def exportar(destino, tenant_id=None, segmentos=4):
+    """Exporta a `destino` (ruta local o s3://bucket/key) y devuelve el resumen."""
+    salida = abrir_destino(destino)
+    progreso = {'inicio': time.perf_counter(), 'usuario': 0, 'organizacion': 0, 'bytes': 0}
+    ultimo_reporte = progreso['inicio']
+    try:
+        with gzip.GzipFile(fileobj=salida, mode='wb') as comprimido:
+            for tipo, paginas in fuentes(tenant_id, segmentos):
+                for pagina in paginas:
+                    lineas = []
+                    for item in pagina:
+                        if tipo == 'usuario' and es_item_conteo(item):
+                            continue
+                        for secreto in SECRETOS:
+                            item.pop(secreto, None)
+                        lineas.append(dumps({'tipo': tipo, 'item': item}) + '\n')
+                    if not lineas:
+                        continue
+                    datos = ''.join(lineas).encode()
+                    comprimido.write(datos)
+                    progreso[tipo] += len(lineas)
+                    progreso['bytes'] += len(datos)
+
+                    ahora = time.perf_counter()
+                    if ahora - ultimo_reporte >= REPORTE_SEGUNDOS:
+                        ultimo_reporte = ahora
+                        logger.info(f"Exportando: {resumen(progreso)}")
+        bytes_gzip = salida.tell()
+        salida.close()
+    except BaseException:
+        if isinstance(salida, SubidaS3):
+            salida.abortar()
+        else:
+            salida.close()
+        raise
+
+    final = {**resumen(progreso), 'bytes_gzip': bytes_gzip, 'destino': destino}
+    logger.info(f"Exportación terminada: {final}")
+    return final
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exporta t_usuario y t_org a NDJSON gzip')
+    parser.add_argument('destino', help='ruta local o s3://bucket/key')
+    parser.add_argument('--tenant', help='solo los usuarios y la organización de este tenant')
+    parser.add_argument('--segmentos', type=int, default=4, help='segmentos del scan paralelo (sin --tenant)')
+    args = parser.parse_args()
+    logging.basicConfig()
+    sys.stdout.write(dumps(exportar(args.destino, args.tenant, max(args.segmentos, 1))) + '\n')
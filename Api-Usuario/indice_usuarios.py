@@ -0,0 +1,60 @@
+import logging
+from boto3.dynamodb.conditions import Key
+from aws_clients import get_table
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# GSI de t_usuario sobre (tenant_id, dni): encuentra a una persona sin conocer su
+# rol. Es disperso: el item de conteo (ver conteo_usuarios) no tiene tenant_id y
+# no entra al índice. Proyecta todos los atributos (el login necesita el hash).
+INDICE_DNI = 'tenant_id-dni-index'
+
+def buscar_por_dni(tenant_id, dni):
+    """Usuarios del tenant con ese dni, uno por rol, con un solo query al GSI.
+
+    El GSI es eventualmente consistente: un usuario recién creado puede tardar
+    unos instantes en aparecer.
+    """
+    tabla = get_table('TABLE_USER')
+    kwargs = {
+        'IndexName': INDICE_DNI,
+        'KeyConditionExpression': Key('tenant_id').eq(tenant_id) & Key('dni').eq(dni)
+    }
+    items = []
+    while True:
+        response = tabla.query(**kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def completar_tenant_id():
+    """Agrega 'tenant_id' a los usuarios creados antes del GSI para que entren al índice."""
+    tabla = get_table('TABLE_USER')
+    actualizados = 0
+    kwargs = {
+        'FilterExpression': 'attribute_not_exists(tenant_id) AND attribute_exists(rol)',
+        'ProjectionExpression': 'tenant_id_rol, dni'
+    }
+    while True:
+        response = tabla.scan(**kwargs)
+        for item in response.get('Items', []):
+            tenant_id = item['tenant_id_rol'].rpartition('#')[0]
+            if not tenant_id:
+                continue
+            tabla.update_item(
+                Key={'tenant_id_rol': item['tenant_id_rol'], 'dni': item['dni']},
+                UpdateExpression='SET tenant_id = :tenant_id',
+                ExpressionAttributeValues={':tenant_id': tenant_id}
+            )
+            actualizados += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return actualizados
+
+if __name__ == '__main__':
+    # Migración: TABLE_USER=dev-t_usuario python indice_usuarios.py
+    logging.basicConfig()
+    print(f"Usuarios agregados al índice por dni: {completar_tenant_id()}")
@@ -0,0 +1,36 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Pool de hilos a nivel de módulo, como los clientes de aws_clients: se crea una
+# vez por contenedor. Los clientes boto3 son thread-safe y comparten su pool de
+# conexiones HTTP (AWS_MAX_POOL_CONNECTIONS), así que las llamadas concurrentes
+# reutilizan las conexiones ya abiertas.
+MAX_HILOS = int(os.environ.get('PARALELO_MAX_HILOS', '8'))
+
+_pool = None
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=MAX_HILOS, thread_name_prefix='paralelo')
+    return _pool
+
+def en_paralelo(*llamadas):
+    """Ejecuta llamadas de I/O independientes a la vez y devuelve sus resultados en orden.
+
+        org, payload = en_paralelo(lambda: buscar_tenant(t), lambda: validar_token(tok, t))
+
+    La primera corre en el hilo actual y el resto en el pool, así el tiempo
+    total es el de la llamada más lenta. Siempre espera a todas antes de
+    volver; si alguna lanza, se propaga la excepción de la primera en orden.
+    """
+    if len(llamadas) <= 1 or MAX_HILOS <= 1:
+        return [llamada() for llamada in llamadas]
+
+    futuros = [get_pool().submit(llamada) for llamada in llamadas[1:]]
+    try:
+        primero = llamadas[0]()
+    finally:
+        # No dejar llamadas en vuelo cuando el handler responde
+        wait(futuros)
+    return [primero] + [futuro.result() for futuro in futuros]
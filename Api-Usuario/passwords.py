@@ -0,0 +1,76 @@
+"""Hash de passwords con KDF (scrypt o PBKDF2) en formato versionado.
+
+Formato almacenado:
+    scrypt$n=16384,r=8,p=1$<salt b64>$<hash b64>
+    pbkdf2_sha256$i=600000$<salt b64>$<hash b64>
+
+Los hashes antiguos (sha256 hexadecimal sin salt) se siguen aceptando y
+`verificar_password` indica que deben re-hashearse con la configuración actual.
+El costo se configura por stage con PASSWORD_ALGORITMO, PASSWORD_SCRYPT_N,
+PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P y PASSWORD_PBKDF2_ITERACIONES.
+"""
+import os
+import hmac
+import base64
+import hashlib
+
+ALGORITMO = os.environ.get('PASSWORD_ALGORITMO', 'scrypt')
+SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 16384))
+SCRYPT_R = int(os.environ.get('PASSWORD_SCRYPT_R', 8))
+SCRYPT_P = int(os.environ.get('PASSWORD_SCRYPT_P', 1))
+PBKDF2_ITERACIONES = int(os.environ.get('PASSWORD_PBKDF2_ITERACIONES', 600000))
+LARGO_SALT = 16
+LARGO_HASH = 32
+
+def _b64(datos):
+    return base64.b64encode(datos).decode('ascii').rstrip('=')
+
+def _unb64(texto):
+    return base64.b64decode(texto + '=' * (-len(texto) % 4))
+
+def _parametros_actuales():
+    if ALGORITMO == 'pbkdf2_sha256':
+        return {'i': PBKDF2_ITERACIONES}
+    return {'n': SCRYPT_N, 'r': SCRYPT_R, 'p': SCRYPT_P}
+
+def _derivar(algoritmo, parametros, password, salt):
+    if algoritmo == 'scrypt':
+        n, r, p = parametros['n'], parametros['r'], parametros['p']
+        # maxmem por defecto de OpenSSL (32 MB) se queda corto desde n=2**15
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r, dklen=LARGO_HASH)
+    if algoritmo == 'pbkdf2_sha256':
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, parametros['i'], dklen=LARGO_HASH)
+    raise ValueError(f'Algoritmo de password no soportado: {algoritmo}')
+
+def hash_password(password, algoritmo=None, parametros=None):
+    """Hash versionado con la configuración del stage (o la indicada)."""
+    algoritmo = algoritmo or ALGORITMO
+    parametros = parametros or _parametros_actuales()
+    salt = os.urandom(LARGO_SALT)
+    derivado = _derivar(algoritmo, parametros, password, salt)
+    texto_parametros = ','.join(f'{k}={v}' for k, v in parametros.items())
+    return f'{algoritmo}${texto_parametros}${_b64(salt)}${_b64(derivado)}'
+
+def es_hash_legado(almacenado):
+    return '$' not in almacenado
+
+def verificar_password(password, almacenado):
+    """Devuelve (valido, necesita_rehash).
+
+    necesita_rehash es True si el hash es sha256 legado o usa un algoritmo o
+    costo distinto al configurado en el stage.
+    """
+    if es_hash_legado(almacenado):
+        legado = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legado, almacenado), True
+
+    try:
+        algoritmo, texto_parametros, salt, esperado = almacenado.split('$')
+        parametros = {k: int(v) for k, v in (p.split('=') for p in texto_parametros.split(','))}
+        derivado = _derivar(algoritmo, parametros, password, _unb64(salt))
+    except (ValueError, KeyError):
+        return False, False
+
+    valido = hmac.compare_digest(derivado, _unb64(esperado))
+    return valido, (algoritmo != ALGORITMO or parametros != _parametros_actuales())
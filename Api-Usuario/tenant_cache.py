@@ -0,0 +1,57 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from aws_clients import get_table
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Los tenants casi nunca se borran: los positivos viven más que los negativos
+TENANT_CACHE_TTL = int(os.environ.get('TENANT_CACHE_TTL', '300'))
+TENANT_CACHE_TTL_NEGATIVO = int(os.environ.get('TENANT_CACHE_TTL_NEGATIVO', '30'))
+TENANT_CACHE_SIZE = int(os.environ.get('TENANT_CACHE_SIZE', '512'))
+
+# Duración de sesión por defecto; cada org puede definir las suyas en t_org
+SESION_MINUTOS = int(os.environ.get('SESION_MINUTOS', '60'))
+REFRESH_VENTANA_MINUTOS = int(os.environ.get('REFRESH_VENTANA_MINUTOS', '15'))
+
+_cache = OrderedDict()
+_stats = {'hits': 0, 'misses': 0}
+
+def buscar_tenant(tenant_id):
+    """Devuelve el item de t_org del tenant, o None si no existe.
+
+    Consulta primero el cache del contenedor; en un miss hace un get_item
+    directo a t_org en lugar de invocar la Lambda buscarorg.
+    """
+    entrada = _cache.get(tenant_id)
+    if entrada is not None and time.time() < entrada[0]:
+        _cache.move_to_end(tenant_id)
+        _stats['hits'] += 1
+        logger.info("tenant_cache hit hits=%d misses=%d", _stats['hits'], _stats['misses'])
+        return entrada[1]
+
+    _stats['misses'] += 1
+    logger.info("tenant_cache miss hits=%d misses=%d", _stats['hits'], _stats['misses'])
+
+    item = get_table('TABLE_ORG').get_item(Key={'tenant_id': tenant_id}).get('Item')
+    ttl = TENANT_CACHE_TTL if item is not None else TENANT_CACHE_TTL_NEGATIVO
+    if TENANT_CACHE_SIZE > 0:
+        _cache[tenant_id] = (time.time() + ttl, item)
+        _cache.move_to_end(tenant_id)
+        while len(_cache) > TENANT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return item
+
+def config_sesion(tenant_id):
+    """(duración del token, ventana de refresh) en segundos para el tenant.
+
+    Usa 'sesion_minutos' y 'refresh_ventana_minutos' del item de t_org si
+    existen. La ventana nunca es mayor que la duración, así un refresh no
+    puede acortar un token.
+    """
+    org = buscar_tenant(tenant_id) or {}
+    duracion = int(org.get('sesion_minutos', SESION_MINUTOS)) * 60
+    ventana = int(org.get('refresh_ventana_minutos', REFRESH_VENTANA_MINUTOS)) * 60
+    return duracion, min(ventana, duracion)
@@ -0,0 +1,83 @@
+"""Compara la latencia por invocación creando el cliente DynamoDB en cada
+llamada (patrón anterior) contra reutilizar el Table de aws_clients.
+
+Uso:
+    pip install -r bench/requirements.txt
+    python bench/bench_clients.py -n 500
+
+Por defecto usa moto como DynamoDB local. Para DynamoDB Local exportar
+AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 y pasar --sin-moto.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'Api-Org'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'bench')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'bench')
+os.environ.setdefault('TABLE_ORG', 'bench-t_org')
+
+import boto3
+
+
+def crear_tabla():
+    cliente = boto3.client('dynamodb')
+    nombre = os.environ['TABLE_ORG']
+    if nombre not in cliente.list_tables()['TableNames']:
+        cliente.create_table(
+            TableName=nombre,
+            KeySchema=[{'AttributeName': 'tenant_id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'tenant_id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+    boto3.resource('dynamodb').Table(nombre).put_item(Item={'tenant_id': 'bench', 'puerto': 9200})
+
+
+def antes():
+    tabla = boto3.resource('dynamodb').Table(os.environ['TABLE_ORG'])
+    tabla.get_item(Key={'tenant_id': 'bench'})
+
+
+def despues():
+    from aws_clients import get_table
+    get_table('TABLE_ORG').get_item(Key={'tenant_id': 'bench'})
+
+
+def medir(nombre, funcion, n):
+    funcion()  # calentamiento
+    tiempos = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    print(f"{nombre:8} n={n} media={statistics.mean(tiempos):.2f}ms "
+          f"p50={tiempos[len(tiempos) // 2]:.2f}ms p95={tiempos[int(len(tiempos) * 0.95)]:.2f}ms")
+    return statistics.mean(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=200, help='invocaciones por escenario')
+    parser.add_argument('--sin-moto', action='store_true', help='usar el endpoint configurado en vez de moto')
+    args = parser.parse_args()
+
+    if args.sin_moto:
+        crear_tabla()
+        a, d = medir('antes', antes, args.n), medir('despues', despues, args.n)
+    else:
+        from moto import mock_aws
+        with mock_aws():
+            crear_tabla()
+            a, d = medir('antes', antes, args.n), medir('despues', despues, args.n)
+
+    print(f"mejora: {a / d:.1f}x por invocación")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""Benchmark de carga en proceso de los handlers de Api-Usuario y Api-Org.
+
+Ejecuta los lambda_handler contra una DynamoDB local (moto por defecto, o
+DynamoDB Local con --sin-moto y AWS_ENDPOINT_URL_DYNAMODB) con una mezcla de
+eventos realista y reporta p50/p95/p99, throughput y llamadas a DynamoDB por
+request de cada escenario.
+
+Uso:
+    pip install -r bench/requirements.txt
+    python bench/bench_handlers.py -n 2000 -c 8
+    python bench/bench_handlers.py --mix login=1,validar=10,listar=2 --json resultados.json
+
+Cada hilo comparte los clientes y caches de módulo, igual que invocaciones
+sucesivas de un mismo contenedor caliente. Con moto el escenario 'crear' corre
+de a uno: su TransactWriteItems no es thread-safe en moto ("dictionary changed
+size during iteration") y los 500 resultantes no serían del handler. Sus
+latencias incluyen la espera de ese turno.
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+import local_aws
+
+MIX_DEFAULT = 'login=2,validar=10,listar=3,buscar=4,crear=1,listarorg=1,buscarorg=3,modiorg=1'
+TENANT = 'bench-org'
+ALUMNOS = 200
+
+_hilo = threading.local()
+
+
+def _contar_llamada(**kwargs):
+    if getattr(_hilo, 'llamadas', None) is not None:
+        _hilo.llamadas += 1
+
+
+class LambdaStub:
+    """Reemplaza lambda_client.invoke enrutando a los handlers en proceso."""
+
+    def __init__(self, funciones):
+        self.funciones = funciones
+
+    def invoke(self, FunctionName, Payload, **kwargs):
+        # Las llamadas DynamoDB del handler invocado se cuentan en el request que invoca
+        handler = self.funciones[FunctionName.rsplit('-', 1)[-1]]
+        respuesta = handler(json.loads(Payload), None)
+        return {'StatusCode': 200, 'Payload': io.BytesIO(json.dumps(respuesta, default=str).encode())}
+
+
+def preparar():
+    # Contar cada operación DynamoDB (incluye las de recursos ya creados por aws_clients)
+    boto3.setup_default_session()
+    boto3.DEFAULT_SESSION.events.register('before-call.dynamodb', _contar_llamada)
+
+    stub = LambdaStub({})
+    local_aws.crear_recursos('Api-Org')
+    # La telemetría de los handlers solo ensuciaría la salida del benchmark
+    os.environ['TELEMETRIA_MUESTREO'] = '0'
+    org = local_aws.cargar_handlers('Api-Org', [
+        'Lambda_ListarOrg', 'Lambda_BuscarOrg', 'Lambda_ModiOrg'
+    ], stub)
+    # Obligatoria en serverless.yml (firma los cursores de ListarUsuario)
+    os.environ.setdefault('CURSOR_SIGNING_KEY', 'bench')
+    local_aws.crear_recursos('Api-Usuario')
+    os.environ['TELEMETRIA_MUESTREO'] = '0'
+    usuario = local_aws.cargar_handlers('Api-Usuario', [
+        'Lambda_LoginUsuario', 'Lambda_ValidarTokenAcceso', 'Lambda_ListarUsuario',
+        'Lambda_BuscarUsuario', 'Lambda_CrearUsuario'
+    ], stub)
+    stub.funciones.update({'buscarorg': org['Lambda_BuscarOrg'], 'validar': usuario['Lambda_ValidarTokenAcceso']})
+
+    # Datos base: una org, su admin y ALUMNOS alumnos
+    boto3.resource('dynamodb').Table(os.environ['TABLE_ORG']).put_item(
+        Item={'tenant_id': TENANT, 'dominio': 'bench.edu', 'descripcion': 'bench', 'correo': 'a@bench.edu', 'puerto': 9200}
+    )
+    crear = usuario['Lambda_CrearUsuario']
+    crear({'body': {'tenant_id': TENANT, 'dni': 'admin', 'full_name': 'Admin', 'password': 'clave', 'rol': 'admin'}}, None)
+    for i in range(ALUMNOS):
+        crear({'body': {'tenant_id': TENANT, 'dni': f'a{i:05}', 'full_name': f'Alumno {i}', 'password': 'clave', 'rol': 'alumno'}}, None)
+
+    login = usuario['Lambda_LoginUsuario']
+    token_admin = login({'body': {'tenant_id': TENANT, 'dni': 'admin', 'password': 'clave', 'rol': 'admin'}}, None)['body']['token']
+    tokens = [
+        login({'body': {'tenant_id': TENANT, 'dni': f'a{i:05}', 'password': 'clave', 'rol': 'alumno'}}, None)['body']['token']
+        for i in range(20)
+    ]
+    return org, usuario, token_admin, tokens
+
+
+def serializado(caso, candado):
+    def llamar():
+        with candado:
+            return caso()
+    return llamar
+
+
+def escenarios(org, usuario, token_admin, tokens, con_moto=True):
+    nuevos = itertools.count()
+
+    def alumno():
+        return f'a{random.randrange(ALUMNOS):05}'
+
+    casos = {
+        'login': lambda: usuario['Lambda_LoginUsuario'](
+            {'body': {'tenant_id': TENANT, 'dni': alumno(), 'password': 'clave', 'rol': 'alumno'}}, None),
+        'validar': lambda: usuario['Lambda_ValidarTokenAcceso'](
+            {'body': {'tenant_id': TENANT, 'token': random.choice(tokens)}}, None),
+        'listar': lambda: usuario['Lambda_ListarUsuario'](
+            {'headers': {'Authorization': token_admin}, 'body': {'tenant_id': TENANT, 'rol': 'alumno', 'limit': 20}}, None),
+        'buscar': lambda: usuario['Lambda_BuscarUsuario'](
+            {'query': {'tenant_id': TENANT, 'dni': alumno(), 'rol': 'alumno'}}, None),
+        'crear': lambda: usuario['Lambda_CrearUsuario'](
+            {'body': {'tenant_id': TENANT, 'dni': f'n{next(nuevos):07}', 'full_name': 'Nuevo', 'password': 'clave', 'rol': 'alumno'}}, None),
+        'listarorg': lambda: org['Lambda_ListarOrg']({'query': {'limit': '50'}}, None),
+        'buscarorg': lambda: org['Lambda_BuscarOrg']({'query': {'tenant_id': TENANT}}, None),
+        'modiorg': lambda: org['Lambda_ModiOrg'](
+            {'headers': {'Authorization': token_admin}, 'body': {'tenant_id': TENANT, 'descripcion': 'bench'}}, None),
+    }
+    if con_moto:
+        casos['crear'] = serializado(casos['crear'], threading.Lock())
+    return casos
+
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+def ejecutar(casos, mix, n, concurrencia):
+    nombres = list(mix)
+    pesos = [mix[k] for k in nombres]
+    plan = random.choices(nombres, weights=pesos, k=n)
+    medidas = defaultdict(list)
+    errores = defaultdict(int)
+    candado = threading.Lock()
+
+    def uno(nombre):
+        _hilo.llamadas = 0
+        inicio = time.perf_counter()
+        respuesta = casos[nombre]()
+        duracion = (time.perf_counter() - inicio) * 1000
+        with candado:
+            medidas[nombre].append((duracion, _hilo.llamadas))
+            if respuesta.get('statusCode', 200) >= 400:
+                errores[nombre] += 1
+        _hilo.llamadas = None
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        list(pool.map(uno, plan))
+    total = time.perf_counter() - inicio
+
+    resultados = {}
+    for nombre in nombres:
+        if not medidas[nombre]:
+            continue
+        tiempos = sorted(d for d, _ in medidas[nombre])
+        resultados[nombre] = {
+            'n': len(tiempos),
+            'p50_ms': round(percentil(tiempos, 50), 2),
+            'p95_ms': round(percentil(tiempos, 95), 2),
+            'p99_ms': round(percentil(tiempos, 99), 2),
+            'media_ms': round(statistics.mean(tiempos), 2),
+            'ddb_por_req': round(statistics.mean(c for _, c in medidas[nombre]), 2),
+            'errores': errores[nombre],
+        }
+    return resultados, n / total
+
+
+def imprimir(resultados, throughput):
+    print(f"{'escenario':<10} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'media':>8} {'ddb/req':>8} {'errores':>8}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<10} {r['n']:>6} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+              f"{r['media_ms']:>8} {r['ddb_por_req']:>8} {r['errores']:>8}")
+    print(f"throughput: {throughput:.1f} req/s")
+
+
+def parsear_mix(texto):
+    mix = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        mix[nombre.strip()] = float(peso or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=1000, help='requests totales')
+    parser.add_argument('-c', type=int, default=4, help='concurrencia (hilos)')
+    parser.add_argument('--mix', default=MIX_DEFAULT, help='pesos por escenario, p. ej. login=1,validar=5')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help='guardar resultados en este archivo')
+    parser.add_argument('--sin-moto', action='store_true', help='usar el endpoint configurado en vez de moto')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    mix = parsear_mix(args.mix)
+
+    def correr():
+        casos = escenarios(*preparar(), con_moto=not args.sin_moto)
+        desconocidos = set(mix) - set(casos)
+        if desconocidos:
+            parser.error(f"escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+        return ejecutar(casos, mix, args.n, args.c)
+
+    if args.sin_moto:
+        resultados, throughput = correr()
+    else:
+        from moto import mock_aws
+        with mock_aws():
+            resultados, throughput = correr()
+
+    imprimir(resultados, throughput)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'throughput': throughput, 'escenarios': resultados}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
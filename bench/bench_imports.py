@@ -0,0 +1,80 @@
+"""Reporte de costo de import (init duration) por handler de Api-Usuario y Api-Org.
+
+Cada handler se importa en un proceso nuevo, igual que en un cold start, y se
+mide el tiempo total del import más los módulos más caros según -X importtime.
+
+Uso:
+    python bench/bench_imports.py
+    python bench/bench_imports.py --repeticiones 5 --top 3 --json imports.json
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICIOS = ['Api-Usuario', 'Api-Org']
+
+MEDIR = "import time; t = time.perf_counter(); import {modulo}; print(time.perf_counter() - t)"
+
+
+def medir(servicio, modulo, repeticiones):
+    directorio = os.path.join(RAIZ, servicio)
+    env = {**os.environ, 'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+           'PYTHONDONTWRITEBYTECODE': '1'}
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', MEDIR.format(modulo=modulo)], cwd=directorio,
+                                env=env, capture_output=True, text=True, check=True)
+        tiempos.append(float(salida.stdout.strip()) * 1000)
+
+    # -X importtime escribe en stderr: "import time: self [us] | cumulative | nombre"
+    detalle = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {modulo}'], cwd=directorio,
+                             env=env, capture_output=True, text=True, check=True).stderr
+    # Salida en post-orden: los imports directos del handler (un nivel de
+    # sangría) aparecen justo antes de su línea sin sangría
+    directos, raices = [], []
+    for linea in detalle.splitlines():
+        partes = linea.split('|')
+        if len(partes) != 3 or not partes[1].strip().isdigit():
+            continue
+        nombre = partes[2].rstrip()
+        sangria = len(nombre) - len(nombre.lstrip())
+        if sangria == 1:
+            if nombre.strip() == modulo:
+                raices = directos
+            directos = []
+        elif sangria == 3:
+            directos.append((int(partes[1]) / 1000, nombre.strip()))
+    return statistics.median(tiempos), sorted(raices, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--top', type=int, default=3, help='imports más caros a mostrar por handler')
+    parser.add_argument('--json', help='guardar resultados en este archivo')
+    args = parser.parse_args()
+
+    resultados = {}
+    for servicio in SERVICIOS:
+        for ruta in sorted(glob.glob(os.path.join(RAIZ, servicio, 'Lambda_*.py'))):
+            modulo = os.path.splitext(os.path.basename(ruta))[0]
+            total, raices = medir(servicio, modulo, args.repeticiones)
+            resultados[f'{servicio}/{modulo}'] = {
+                'import_ms': round(total, 1),
+                'top': [{'modulo': n, 'ms': round(ms, 1)} for ms, n in raices[:args.top]]
+            }
+            top = ', '.join(f"{n} {ms:.0f}ms" for ms, n in raices[:args.top])
+            print(f"{servicio + '/' + modulo:<42} {total:>8.1f}ms   {top}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
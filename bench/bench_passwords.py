@@ -0,0 +1,76 @@
+"""Micro-benchmark del costo de CPU de passwords.hash_password por configuración.
+
+Reporta el tiempo medio de un hash (igual al de una verificación en login) para
+varios costos de scrypt y PBKDF2, y una estimación en Lambda: con 1024 MB se
+asignan ~0.58 vCPU, así que el tiempo local se escala por 1/0.58 (ajustable con
+--vcpu si la máquina local es mucho más rápida o lenta que un core de Lambda).
+
+Uso:
+    python bench/bench_passwords.py
+    python bench/bench_passwords.py --repeticiones 20 --json passwords.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'Api-Usuario'))
+
+import passwords  # noqa: E402
+
+CONFIGURACIONES = [
+    ('scrypt', {'n': 2 ** 12, 'r': 8, 'p': 1}),
+    ('scrypt', {'n': 2 ** 13, 'r': 8, 'p': 1}),
+    ('scrypt', {'n': 2 ** 14, 'r': 8, 'p': 1}),
+    ('scrypt', {'n': 2 ** 15, 'r': 8, 'p': 1}),
+    ('scrypt', {'n': 2 ** 16, 'r': 8, 'p': 1}),
+    ('pbkdf2_sha256', {'i': 100000}),
+    ('pbkdf2_sha256', {'i': 210000}),
+    ('pbkdf2_sha256', {'i': 600000}),
+]
+
+
+def medir(algoritmo, parametros, repeticiones):
+    passwords.hash_password('calentamiento', algoritmo, parametros)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        passwords.hash_password('clave-de-prueba', algoritmo, parametros)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), max(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--vcpu', type=float, default=0.58, help='fracción de vCPU de la Lambda (1024 MB ~ 0.58)')
+    parser.add_argument('--json', help='guardar resultados en este archivo')
+    args = parser.parse_args()
+
+    actual = (passwords.ALGORITMO, passwords._parametros_actuales())
+    print(f"{'configuración':<34} {'mediana':>9} {'máx':>9} {'lambda':>9} {'hash/s':>8}")
+    resultados = []
+    for algoritmo, parametros in CONFIGURACIONES:
+        mediana, maximo = medir(algoritmo, parametros, args.repeticiones)
+        en_lambda = mediana / args.vcpu
+        nombre = f"{algoritmo} {','.join(f'{k}={v}' for k, v in parametros.items())}"
+        marca = '  <- stage actual' if (algoritmo, parametros) == actual else ''
+        print(f"{nombre:<34} {mediana:>7.1f}ms {maximo:>7.1f}ms {en_lambda:>7.1f}ms {1000 / en_lambda:>8.1f}{marca}")
+        resultados.append({
+            'algoritmo': algoritmo,
+            'parametros': parametros,
+            'mediana_ms': round(mediana, 2),
+            'max_ms': round(maximo, 2),
+            'lambda_estimado_ms': round(en_lambda, 2),
+        })
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'vcpu': args.vcpu, 'resultados': resultados}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Prueba de carga de t_token con los layouts 'tenant' y 'token' (TOKEN_LAYOUT).
+
+Simula el pico de matrícula de un tenant grande: cada sesión hace login (put),
+varias validaciones (get) y logout (delete) con los handlers reales de
+Api-Usuario. moto no limita el throughput por partición, así que el benchmark
+aplica el límite de DynamoDB por valor de partition key (1000 WCU/s y 3000 RCU/s,
+escalados con --escala para que la prueba sea corta): una operación que excede
+la capacidad de su partición espera, como los reintentos del SDK ante un
+throttling. Con el layout 'tenant' todas las operaciones del tenant comparten
+una partición; con 'token' cada token tiene la suya.
+
+Uso:
+    pip install -r bench/requirements.txt
+    python bench/bench_tokens.py
+    python bench/bench_tokens.py --sesiones 400 -c 32 --validaciones 5 --escala 0.02 --json tokens.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+import local_aws
+
+TENANT = 'bench-grande'
+USUARIOS = 100
+# Límites de DynamoDB por valor de partition key
+WCU_POR_PARTICION = 1000
+RCU_POR_PARTICION = 3000
+# Unidades por operación con items < 1 KB; GetItem es eventualmente consistente
+UNIDADES = {'PutItem': ('w', 1), 'DeleteItem': ('w', 1), 'UpdateItem': ('w', 1), 'GetItem': ('r', 0.5)}
+
+
+class LimitePorParticion:
+    """Cubeta de capacidad por partición: demora las operaciones que la exceden."""
+
+    def __init__(self, escala):
+        self.capacidad = {'w': WCU_POR_PARTICION * escala, 'r': RCU_POR_PARTICION * escala}
+        self.tabla = None
+        self.atributo = None
+        self.libre_desde = {}
+        self.candado = threading.Lock()
+        self.demoradas = 0
+        self.espera = 0.0
+        self.particiones = set()
+
+    def configurar(self, tabla, atributo):
+        self.tabla, self.atributo = tabla, atributo
+        self.libre_desde.clear()
+        self.particiones.clear()
+        self.demoradas, self.espera = 0, 0.0
+
+    def antes(self, model, params, **kwargs):
+        if model.name not in UNIDADES:
+            return
+        # `params` es el request HTTP ya serializado: el body trae los parámetros
+        cuerpo = json.loads(params['body'] or '{}')
+        if cuerpo.get('TableName') != self.tabla:
+            return
+        clave = cuerpo.get('Key') or cuerpo.get('Item') or {}
+        particion = next(iter(clave.get(self.atributo, {}).values()), None)
+        tipo, unidades = UNIDADES[model.name]
+        ahora = time.perf_counter()
+        with self.candado:
+            # Cada partición atiende `capacidad` unidades por segundo, en orden de llegada
+            inicio = max(ahora, self.libre_desde.get((tipo, particion), ahora))
+            self.libre_desde[(tipo, particion)] = inicio + unidades / self.capacidad[tipo]
+            self.particiones.add(particion)
+            if inicio > ahora:
+                self.demoradas += 1
+                self.espera += inicio - ahora
+        if inicio > ahora:
+            time.sleep(inicio - ahora)
+
+
+def preparar(limite):
+    boto3.setup_default_session()
+    boto3.DEFAULT_SESSION.events.register('before-call.dynamodb', limite.antes)
+    local_aws.crear_recursos('Api-Org')
+    # Obligatoria en serverless.yml (firma los cursores de ListarUsuario)
+    os.environ.setdefault('CURSOR_SIGNING_KEY', 'bench')
+    local_aws.crear_recursos('Api-Usuario')
+    # Validar siempre contra la tabla (muchos contenedores fríos) y un KDF barato:
+    # el benchmark mide t_token, no el hash del password
+    os.environ.update(TELEMETRIA_MUESTREO='0', TOKEN_CACHE_SIZE='0', PASSWORD_SCRYPT_N='1024')
+    boto3.resource('dynamodb').Table(os.environ['TABLE_ORG']).put_item(Item={'tenant_id': TENANT})
+    crear = local_aws.cargar_handlers('Api-Usuario', ['Lambda_CrearUsuario'])['Lambda_CrearUsuario']
+    for i in range(USUARIOS):
+        crear({'body': {'tenant_id': TENANT, 'dni': f'a{i:05}', 'full_name': f'Alumno {i}',
+                        'password': 'clave', 'rol': 'alumno'}}, None)
+
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+def ejecutar(layout, limite, sesiones, concurrencia, validaciones):
+    os.environ['TOKEN_LAYOUT'] = layout
+    handlers = local_aws.cargar_handlers('Api-Usuario', [
+        'Lambda_LoginUsuario', 'Lambda_ValidarTokenAcceso', 'Lambda_Logout'
+    ])
+    tabla = os.environ['TABLE_TOKEN_POR_TOKEN' if layout == 'token' else 'TABLE_TOKEN']
+    limite.configurar(tabla, 'token' if layout == 'token' else 'tenant_id')
+
+    tiempos = defaultdict(list)
+    errores = defaultdict(int)
+    candado = threading.Lock()
+
+    def medir(nombre, handler, event):
+        inicio = time.perf_counter()
+        respuesta = handler(event, None)
+        duracion = (time.perf_counter() - inicio) * 1000
+        with candado:
+            tiempos[nombre].append(duracion)
+            if respuesta['statusCode'] != 200:
+                errores[nombre] += 1
+        return respuesta
+
+    def sesion(_):
+        dni = f'a{random.randrange(USUARIOS):05}'
+        login = medir('login', handlers['Lambda_LoginUsuario'],
+                      {'body': {'tenant_id': TENANT, 'dni': dni, 'password': 'clave', 'rol': 'alumno'}})
+        token = login['body'].get('token')
+        if not token:
+            return
+        for _ in range(validaciones):
+            medir('validar', handlers['Lambda_ValidarTokenAcceso'], {'body': {'tenant_id': TENANT, 'token': token}})
+        medir('logout', handlers['Lambda_Logout'], {'body': {'tenant_id': TENANT, 'token': token}})
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        list(pool.map(sesion, range(sesiones)))
+    total = time.perf_counter() - inicio
+
+    operaciones = sum(len(t) for t in tiempos.values())
+    resultado = {
+        'layout': layout,
+        'tabla': tabla,
+        'operaciones': operaciones,
+        'segundos': round(total, 2),
+        'ops_por_segundo': round(operaciones / total, 1),
+        'particiones': len(limite.particiones),
+        'demoradas': limite.demoradas,
+        'espera_media_ms': round(limite.espera / max(limite.demoradas, 1) * 1000, 2),
+        'handlers': {}
+    }
+    for nombre, valores in tiempos.items():
+        valores.sort()
+        resultado['handlers'][nombre] = {
+            'n': len(valores),
+            'p50_ms': round(percentil(valores, 50), 2),
+            'p95_ms': round(percentil(valores, 95), 2),
+            'p99_ms': round(percentil(valores, 99), 2),
+            'media_ms': round(statistics.mean(valores), 2),
+            'errores': errores[nombre],
+        }
+    return resultado
+
+
+def imprimir(resultados):
+    for r in resultados:
+        print(f"\nlayout={r['layout']} tabla={r['tabla']} particiones={r['particiones']} "
+              f"demoradas={r['demoradas']} espera_media={r['espera_media_ms']} ms")
+        print(f"{'handler':<10} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'media':>8} {'errores':>8}")
+        for nombre, h in r['handlers'].items():
+            print(f"{nombre:<10} {h['n']:>6} {h['p50_ms']:>8} {h['p95_ms']:>8} {h['p99_ms']:>8} "
+                  f"{h['media_ms']:>8} {h['errores']:>8}")
+        print(f"throughput: {r['ops_por_segundo']} ops/s ({r['operaciones']} en {r['segundos']} s)")
+    if len(resultados) == 2 and resultados[0]['ops_por_segundo']:
+        print(f"\n'{resultados[1]['layout']}' / '{resultados[0]['layout']}': "
+              f"{resultados[1]['ops_por_segundo'] / resultados[0]['ops_por_segundo']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sesiones', type=int, default=300, help='sesiones login + validaciones + logout')
+    parser.add_argument('-c', type=int, default=32, help='concurrencia (hilos)')
+    parser.add_argument('--validaciones', type=int, default=5, help='validaciones por sesión')
+    parser.add_argument('--escala', type=float, default=0.02,
+                        help='fracción de la capacidad real por partición (1 = 1000 WCU/3000 RCU)')
+    parser.add_argument('--layouts', default='tenant,token')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help='guardar resultados en este archivo')
+    parser.add_argument('--sin-moto', action='store_true', help='usar el endpoint configurado en vez de moto')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    limite = LimitePorParticion(args.escala)
+
+    def correr():
+        preparar(limite)
+        return [ejecutar(layout.strip(), limite, args.sesiones, args.c, args.validaciones)
+                for layout in args.layouts.split(',')]
+
+    if args.sin_moto:
+        resultados = correr()
+    else:
+        from moto import mock_aws
+        with mock_aws():
+            resultados = correr()
+
+    imprimir(resultados)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
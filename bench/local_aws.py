@@ -0,0 +1,100 @@
+"""Entorno AWS local para los benchmarks: tablas, colas y variables de entorno
+tomadas de los serverless.yml, y carga en proceso de los handlers de cada API."""
+import importlib
+import os
+import re
+import sys
+
+import boto3
+import yaml
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGE = 'bench'
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'bench')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'bench')
+
+
+class _Loader(yaml.SafeLoader):
+    pass
+
+
+# Etiquetas de CloudFormation (!Ref, !GetAtt...) como dicts simples
+_Loader.add_multi_constructor('!', lambda loader, tag, node: {tag[1:]: loader.construct_scalar(node)
+                                                              if isinstance(node, yaml.ScalarNode)
+                                                              else loader.construct_sequence(node)})
+
+
+def leer_serverless(servicio):
+    with open(os.path.join(RAIZ, servicio, 'serverless.yml')) as f:
+        return yaml.load(f, Loader=_Loader)
+
+
+def _resolver(valor, colas, params=None):
+    if isinstance(valor, dict) and 'Ref' in valor:
+        return colas.get(valor['Ref'], '')
+    valor = str(valor).replace('${sls:stage}', STAGE)
+
+    def env(m):
+        return os.environ.get(m.group(1), m.group(2).strip("'\""))
+
+    def env_obligatoria(m):
+        # Como sls deploy: una variable sin default tiene que estar definida
+        if m.group(1) not in os.environ:
+            raise KeyError(f"Falta la variable de entorno {m.group(1)} (obligatoria en serverless.yml)")
+        return os.environ[m.group(1)]
+
+    def param(m):
+        return str((params or {}).get(m.group(1), ''))
+    valor = re.sub(r"\$\{param:(\w+)\}", param, valor)
+    valor = re.sub(r"\$\{env:(\w+)\}", env_obligatoria, valor)
+    return re.sub(r"\$\{env:(\w+),\s*([^}]*)\}", env, valor)
+
+
+def crear_recursos(servicio):
+    """Crea las tablas y colas del servicio y exporta sus variables de entorno."""
+    config = leer_serverless(servicio)
+    recursos = config.get('resources', {}).get('Resources', {})
+    dynamodb = boto3.client('dynamodb')
+    sqs = boto3.client('sqs')
+    existentes = set(dynamodb.list_tables()['TableNames'])
+    colas = {}
+
+    for nombre, recurso in recursos.items():
+        props = recurso.get('Properties', {})
+        if recurso['Type'] == 'AWS::DynamoDB::Table':
+            tabla = _resolver(props['TableName'], colas)
+            if tabla in existentes:
+                continue
+            kwargs = {k: props[k] for k in ['AttributeDefinitions', 'KeySchema', 'GlobalSecondaryIndexes'] if k in props}
+            dynamodb.create_table(TableName=tabla, BillingMode='PAY_PER_REQUEST', **kwargs)
+            existentes.add(tabla)
+        elif recurso['Type'] == 'AWS::SQS::Queue':
+            colas[nombre] = sqs.create_queue(QueueName=_resolver(props['QueueName'], colas))['QueueUrl']
+
+    todos = config.get('params', {})
+    params = {**todos.get('default', {}), **todos.get(STAGE, {})}
+    for clave, valor in config['provider'].get('environment', {}).items():
+        os.environ[clave] = _resolver(valor, colas, params)
+
+
+def cargar_handlers(servicio, modulos, lambda_client=None):
+    """Importa los módulos Lambda_* de un servicio y devuelve {modulo: lambda_handler}.
+
+    Las APIs comparten nombres de módulos (aws_clients, token_auth...), así que
+    antes de importar se descargan los del otro servicio. Los handlers ya
+    importados conservan sus propias referencias. `lambda_client` reemplaza el
+    cliente Lambda de aws_clients (p. ej. un stub que invoca handlers locales).
+    """
+    directorio = os.path.join(RAIZ, servicio)
+    for nombre, modulo in list(sys.modules.items()):
+        archivo = getattr(modulo, '__file__', None) or ''
+        if archivo.startswith(RAIZ + os.sep) and not archivo.startswith(os.path.join(RAIZ, 'bench')):
+            del sys.modules[nombre]
+    sys.path[:] = [p for p in sys.path if not (p.startswith(RAIZ + os.sep) and p != os.path.join(RAIZ, 'bench'))]
+    sys.path.insert(0, directorio)
+    handlers = {nombre: importlib.import_module(nombre).lambda_handler for nombre in modulos}
+    if lambda_client is not None:
+        importlib.import_module('aws_clients')._lambda_client = lambda_client
+    return handlers
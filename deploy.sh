@@ -10,14 +10,17 @@ NC='\033[0m' # No Color
 # Deploy Api-Usuario
 echo -e "${GREEN}1. Desplegando Api-Usuario...${NC}"
 cd Api-Usuario
-
+# orjson se empaqueta en todas las funciones (ver codec.py): wheel para Lambda
+pip install orjson -t . --platform manylinux2014_x86_64 --python-version 3.12 --only-binary=:all:
 sls deploy
 cd ..
 
 # Deploy Api-Org
 echo -e "${GREEN}2. Desplegando Api-Org...${NC}"
 cd Api-Org
+# requests solo se empaqueta en provisionarorg (ver package.patterns en serverless.yml)
 pip install requests -t .
+pip install orjson -t . --platform manylinux2014_x86_64 --python-version 3.12 --only-binary=:all:
 sls deploy
 cd ..
 